@@ -0,0 +1,104 @@
+"""Замер выделений памяти на горячем пути текстовых сообщений.
+
+Сравнивает, что делает бот на каждое сообщение, до и после UserInterface:
+  legacy - новая ReplyKeyboardMarkup с шестью KeyboardButton на каждый ответ
+           и разбор текста цепочкой if/elif (как работал handle_message раньше),
+  cached - действие из словаря UserInterface.route и готовая клавиатура языка.
+
+Объекты каждого прохода удерживаются до конца замера, поэтому tracemalloc
+видит все созданные блоки; выводится число блоков и байт на сообщение и
+время на сообщение.
+
+Пример запуска:
+    python AllocationBenchmark.py --messages 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from telegram import KeyboardButton, ReplyKeyboardMarkup, User
+
+from UserInterface import UserInterface, LOCALES
+
+# Тексты входящих сообщений: все кнопки меню и произвольный текст
+MESSAGES = list(LOCALES["ru"]["buttons"].values()) + ["яблоко apple", "привет"]
+USER = User(id=1, first_name="Benchmark", is_bot=False, language_code="ru")
+
+
+# ==================== СТАРЫЙ ГОРЯЧИЙ ПУТЬ ====================
+def _legacy_main_menu():
+    return ReplyKeyboardMarkup([
+        [KeyboardButton("➕ Добавить слово"), KeyboardButton("🗑️ Удалить слово")],
+        [KeyboardButton("📋 Список слов"), KeyboardButton("📊 Статистика")],
+        [KeyboardButton("🎯 Викторина"), KeyboardButton("❌ Скрыть клавиатуру")]
+    ], resize_keyboard=True)
+
+
+def _legacy_route(text):
+    if text == "➕ Добавить слово":
+        return "add"
+    elif text == "🗑️ Удалить слово":
+        return "remove"
+    elif text == "📋 Список слов":
+        return "list"
+    elif text == "📊 Статистика":
+        return "stats"
+    elif text == "🎯 Викторина":
+        return "quiz"
+    elif text == "❌ Скрыть клавиатуру":
+        return "hide"
+    elif text == "Отмена":
+        return "cancel"
+    return None
+
+
+def legacy(text, user):
+    return _legacy_route(text), _legacy_main_menu()
+
+
+# ==================== НОВЫЙ ГОРЯЧИЙ ПУТЬ ====================
+def make_cached():
+    ui = UserInterface()
+
+    def cached(text, user):
+        return ui.route(text), ui.locale(user).main_menu
+
+    return cached
+
+
+# ==================== ЗАМЕР ====================
+def measure(handle, messages):
+    """Возвращает (блоков на сообщение, байт на сообщение, мкс на сообщение)"""
+    texts = [MESSAGES[i % len(MESSAGES)] for i in range(messages)]
+
+    started_at = time.perf_counter()
+    for text in texts:
+        handle(text, USER)
+    elapsed = time.perf_counter() - started_at
+
+    # Список для результатов создается заранее, чтобы его рост не попал в замер
+    results = [None] * messages
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i, text in enumerate(texts):
+        results[i] = handle(text, USER)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / messages, size / messages, elapsed / messages * 1e6
+
+
+def main(args):
+    print(f"{'вариант':<8} {'блоков/сообщ':>13} {'байт/сообщ':>11} {'мкс/сообщ':>10}")
+    for name, handle in (("legacy", legacy), ("cached", make_cached())):
+        blocks, size, micros = measure(handle, args.messages)
+        print(f"{name:<8} {blocks:>13.1f} {size:>11.0f} {micros:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выделения памяти на горячем пути текстовых сообщений")
+    parser.add_argument("--messages", type=int, default=100000, help="число сообщений")
+    main(parser.parse_args())
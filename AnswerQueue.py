@@ -0,0 +1,45 @@
+"""Отложенная пакетная запись ответов викторины.
+
+Нажатие кнопки ответа не ждет записи в БД: результат повторения попадает в
+общий для всех пользователей буфер, который сбрасывается одним многострочным
+UPDATE раз в flush_interval секунд или при накоплении max_batch ответов.
+Число транзакций растет с числом сбросов, а не с числом нажатий.
+"""
+from BufferedWriter import BufferedWriter
+
+
+class AnswerQueue(BufferedWriter):
+    flush_error = "Ошибка при сохранении ответов викторины"
+
+    def __init__(self, db, flush_interval=1.0, max_batch=500):
+        super().__init__(flush_interval, max_batch)
+        self.db = db
+        # _pending: (user_id, word_id) -> словарь результата для DatabaseManager.save_reviews
+
+    async def record(self, user_id, word_id, review, due_at, was_passed):
+        """Ставит результат повторения слова в очередь на запись"""
+        key = (user_id, word_id)
+        previous = self._pending.get(key)
+        self._pending[key] = {
+            "user_id": user_id,
+            "word_id": word_id,
+            "ease": review.ease,
+            "interval_days": review.interval_days,
+            "repetitions": review.repetitions,
+            "passed_word": review.passed_word,
+            "due_at": due_at,
+            # При повторном ответе до сброса статистика считается от состояния в БД
+            "was_passed": previous["was_passed"] if previous else was_passed,
+        }
+        await self._buffered()
+
+    async def _write(self, pending):
+        await self.db.save_reviews(list(pending.values()))
+
+    def _requeue(self, pending):
+        # Более новые ответы остаются в буфере, но сохраняют исходный was_passed
+        for key, review in pending.items():
+            if key in self._pending:
+                self._pending[key]["was_passed"] = review["was_passed"]
+            else:
+                self._pending[key] = review
@@ -1,36 +1,33 @@
 import logging
-
-from dotenv import load_dotenv
+from datetime import datetime, timezone
 
 # Проверка зависимостей
 try:
-    import psycopg2
-    from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, text, Index
-    from sqlalchemy.orm import sessionmaker, declarative_base, relationship, close_all_sessions
-    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, DateTime, Text, Float
+    from sqlalchemy.orm import declarative_base, relationship
 except ImportError as e:
     print("Ошибка: Не установлены необходимые зависимости. Установите их командой:")
-    print("pip install psycopg2-binary sqlalchemy python-dotenv python-telegram-bot")
+    print('pip install "sqlalchemy[asyncio]"')
     raise
 
-# Настройка логирования
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
 logger = logging.getLogger(__name__)
 
-# Загрузка переменных окружения
-load_dotenv()
-
-
 
 # ==================== МОДЕЛИ БАЗЫ ДАННЫХ ====================
 Base = declarative_base()
 
 
+def utcnow():
+    """Текущее время в UTC без часового пояса (так хранятся даты в БД)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Word(Base):
     __tablename__ = 'words'
+    __table_args__ = (
+        Index('idx_word_pair', 'target_word', 'translate_word', unique=True),
+        Index('idx_word_target', 'target_word', 'id'),
+    )
     id = Column(Integer, primary_key=True)
     target_word = Column(String(255), nullable=False)  # Слово на русском
     translate_word = Column(String(255), nullable=False)  # Перевод на английский
@@ -42,11 +39,18 @@ class UserWord(Base):
     __tablename__ = 'user_words'
     __table_args__ = (
         Index('idx_user_word', 'user_id', 'word_id', unique=True),
+        Index('idx_user_word_due', 'user_id', 'due_at'),  # Очередь повторения
     )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
     word_id = Column(Integer, ForeignKey('words.id'), nullable=False)
     passed_word = Column(Boolean, default=False, nullable=False)  # Флаг изучения слова
+    added_at = Column(DateTime, default=utcnow)  # Когда слово добавлено пользователю (UTC)
+    # Интервальное повторение (SM-2)
+    ease = Column(Float, default=2.5, nullable=False)  # Коэффициент легкости
+    interval_days = Column(Integer, default=0, nullable=False)  # Текущий интервал повторения
+    repetitions = Column(Integer, default=0, nullable=False)  # Правильных ответов подряд
+    due_at = Column(DateTime, default=utcnow, nullable=False)  # Когда слово пора повторить (UTC)
 
 
 class IgnoreWord(Base):
@@ -56,4 +60,15 @@ class IgnoreWord(Base):
     )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
-    word_id = Column(Integer, ForeignKey('words.id'), nullable=False)
\ No newline at end of file
+    word_id = Column(Integer, ForeignKey('words.id'), nullable=False)
+
+
+class QuizState(Base):
+    """Состояние заданного вопроса викторины (для хранилища состояний в БД)"""
+    __tablename__ = 'quiz_states'
+    __table_args__ = (
+        Index('idx_quiz_state_expires', 'expires_at'),
+    )
+    key = Column(String(64), primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON с данными для проверки ответа
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,170 @@
+"""Замер задержки обработчиков под нагрузкой N одновременных пользователей.
+
+Сравнивает два режима доступа к БД:
+  sync  - синхронные запросы внутри корутин (как обработчики работали раньше),
+  async - асинхронные запросы DatabaseManager.
+
+Каждый пользователь отправляет запросы по расписанию (раз в --think секунд),
+задержка считается от запланированного момента запроса до его завершения,
+поэтому блокировка цикла событий одним запросом видна в хвосте распределения.
+
+Пример запуска:
+    python Benchmark.py --users 50 --rounds 20 --think 0.05
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from sqlalchemy import func, text
+
+from BaseModel import Word, UserWord
+from DatabaseManeger import DatabaseManager
+from QuizEngine import QuizEngine
+
+logger = logging.getLogger(__name__)
+
+BASE_USER_ID = 10_000_000
+
+
+# ==================== СИНХРОННЫЕ ЗАПРОСЫ (СТАРЫЕ ОБРАБОТЧИКИ) ====================
+def _sync_stats(db, user_id):
+    with db.get_session() as session:
+        session.query(UserWord).filter_by(user_id=user_id).count()
+        session.query(UserWord).filter_by(user_id=user_id, passed_word=True).count()
+
+
+def _sync_list(db, user_id):
+    with db.get_session() as session:
+        session.query(UserWord).filter_by(user_id=user_id).count()
+        words = session.query(Word).join(UserWord).filter(
+            UserWord.user_id == user_id
+        ).order_by(Word.target_word).limit(10).all()
+        for word in words:
+            session.query(UserWord).filter_by(user_id=user_id, word_id=word.id, passed_word=True).first()
+
+
+def _sync_quiz(db, user_id):
+    with db.get_session() as session:
+        user_words = session.query(Word).join(UserWord).filter(
+            UserWord.user_id == user_id,
+            UserWord.passed_word.is_(False)
+        ).all()
+        added_words_ids = [w.id for w in user_words]
+        all_words = session.query(Word).filter(
+            ~Word.id.in_(added_words_ids) if added_words_ids else True
+        ).order_by(func.random()).limit(5).all()
+        word = random.choice(user_words + all_words)
+        session.execute(
+            text("SELECT translate_word FROM words WHERE translate_word != :correct "
+                 "GROUP BY translate_word ORDER BY RANDOM() LIMIT 3").bindparams(correct=word.translate_word)
+        ).fetchall()
+
+
+def sync_operations(db):
+    async def stats(user_id):
+        _sync_stats(db, user_id)
+
+    async def list_words(user_id):
+        _sync_list(db, user_id)
+
+    async def quiz(user_id):
+        _sync_quiz(db, user_id)
+
+    return {"stats": stats, "list": list_words, "quiz": quiz}
+
+
+# ==================== АСИНХРОННЫЕ ЗАПРОСЫ ====================
+def async_operations(db, quiz_engine):
+    async def stats(user_id):
+        await db.get_stats(user_id)
+
+    async def list_words(user_id):
+        await db.get_words_page(user_id, 10)
+
+    async def quiz(user_id):
+        await quiz_engine.next_question(user_id)
+
+    return {"stats": stats, "list": list_words, "quiz": quiz}
+
+
+# ==================== НАГРУЗКА ====================
+def percentile(values, p):
+    """Перцентиль p (0-100) по отсортированному списку значений"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+async def simulate(operations, users, rounds, think):
+    """Запускает users пользователей, каждый выполняет rounds случайных операций"""
+    latencies = {name: [] for name in operations}
+    names = list(operations)
+    started_at = time.perf_counter()
+
+    async def user(user_id):
+        # Смещение старта, чтобы запросы пользователей не приходили строго одновременно
+        offset = random.uniform(0, think)
+        for round_no in range(rounds):
+            scheduled = started_at + offset + round_no * think
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = random.choice(names)
+            await operations[name](user_id)
+            latencies[name].append(time.perf_counter() - scheduled)
+
+    await asyncio.gather(*(user(BASE_USER_ID + i) for i in range(users)))
+    return latencies, time.perf_counter() - started_at
+
+
+async def seed(db, users, words_per_user):
+    """Наполняет словари синтетических пользователей"""
+    for i in range(users):
+        for j in range(words_per_user):
+            await db.add_user_word(BASE_USER_ID + i, f"слово{j}", f"word{j}")
+
+
+def report(mode, latencies, elapsed):
+    all_values = sorted(v for values in latencies.values() for v in values)
+    print(f"\n[{mode}] запросов: {len(all_values)}, время: {elapsed:.2f} с, "
+          f"пропускная способность: {len(all_values) / elapsed:.1f} запр/с")
+    for name, values in sorted(latencies.items()) + [("all", all_values)]:
+        values = sorted(values)
+        print(f"  {name:<6} p50={percentile(values, 50) * 1000:8.1f} мс  "
+              f"p99={percentile(values, 99) * 1000:8.1f} мс  n={len(values)}")
+
+
+async def main(args):
+    db = DatabaseManager()
+    try:
+        if "sync" in args.modes and db.partitions.emulated:
+            # Старые обработчики читают только базовую таблицу user_words
+            raise SystemExit(
+                "Режим sync не поддерживает секции SQLite (USER_PARTITIONS > 1): запустите с --modes async"
+            )
+        if args.seed_words:
+            await seed(db, args.users, args.seed_words)
+
+        # Индекс вариантов загружается до замера, как при запуске бота
+        quiz_engine = QuizEngine(db)
+        await quiz_engine.distractors.refresh(db)
+
+        for mode in args.modes:
+            operations = sync_operations(db) if mode == "sync" else async_operations(db, quiz_engine)
+            latencies, elapsed = await simulate(operations, args.users, args.rounds, args.think)
+            report(mode, latencies, elapsed)
+    finally:
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Задержка обработчиков: sync против async доступа к БД")
+    parser.add_argument("--users", type=int, default=50, help="число одновременных пользователей")
+    parser.add_argument("--rounds", type=int, default=20, help="запросов на пользователя")
+    parser.add_argument("--think", type=float, default=0.05, help="интервал между запросами пользователя, с")
+    parser.add_argument("--seed-words", type=int, default=0, help="добавить N слов каждому пользователю")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""Буфер отложенной пакетной записи в БД.
+
+Общая основа AnswerQueue и DatabaseQuizStateStore: изменения копятся в словаре
+key -> запись и сбрасываются одним вызовом _write раз в flush_interval секунд
+(фоновая задача start/close) или при накоплении max_batch изменений. Если
+запись не удалась, пачка возвращается в буфер (_requeue) и будет записана при
+следующем сбросе; close() останавливает фоновую задачу и записывает остаток.
+"""
+import abc
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter(abc.ABC):
+    # Текст ошибки фонового сброса для журнала
+    flush_error = "Ошибка при сохранении изменений"
+
+    def __init__(self, flush_interval, max_batch):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = {}
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+
+    @abc.abstractmethod
+    async def _write(self, pending):
+        """Записывает пачку pending (словарь key -> запись) в БД"""
+
+    def _requeue(self, pending):
+        """Возвращает незаписанную пачку в буфер, если ключи не перезаписаны новыми изменениями"""
+        for key, entry in pending.items():
+            self._pending.setdefault(key, entry)
+
+    async def _buffered(self):
+        """Вызывается после добавления в буфер: сброс при накоплении max_batch изменений"""
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+
+    async def _wait_flush(self):
+        """Дожидается записи пачки, которая сбрасывается прямо сейчас"""
+        if self._flush_lock.locked():
+            async with self._flush_lock:
+                pass
+
+    async def flush(self):
+        """Записывает накопленные изменения в БД"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                await self._write(pending)
+            except Exception:
+                self._requeue(pending)
+                raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"{self.flush_error}: {e}")
+
+    async def start(self):
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Останавливает фоновый сброс и записывает оставшиеся изменения"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,53 @@
+"""Компактные callback_data для кнопок ответа викторины.
+
+Telegram ограничивает callback_data 64 байтами, поэтому вместо текста ответа
+кнопка несет id вопроса и номер варианта, упакованные в байты:
+
+    6 байт id вопроса | 1 байт номер варианта | 4 байта подписи
+
+и закодированные в base64url с префиксом "a" (17 символов). Подпись (HMAC)
+отсекает поврежденные и подделанные данные до обращения к хранилищу.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+
+ANSWER_PREFIX = "a"
+QUESTION_ID_BYTES = 6
+TAG_BYTES = 4
+
+
+def new_question_id():
+    """Случайный 48-битный id вопроса, уникальный между воркерами"""
+    return secrets.randbits(QUESTION_ID_BYTES * 8)
+
+
+class CallbackCodec:
+    def __init__(self, secret):
+        self._key = hashlib.sha256(b"callback:" + secret.encode()).digest()
+
+    def _tag(self, payload):
+        return hmac.new(self._key, payload, hashlib.sha256).digest()[:TAG_BYTES]
+
+    def encode_answer(self, question_id, option):
+        """Упаковывает id вопроса и номер варианта в строку callback_data"""
+        payload = question_id.to_bytes(QUESTION_ID_BYTES, "big") + bytes([option])
+        return ANSWER_PREFIX + base64.urlsafe_b64encode(payload + self._tag(payload)).decode()
+
+    def decode_answer(self, data):
+        """Возвращает (id вопроса, номер варианта) или None, если данные некорректны"""
+        if not data or not data.startswith(ANSWER_PREFIX):
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(data[len(ANSWER_PREFIX):])
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) != QUESTION_ID_BYTES + 1 + TAG_BYTES:
+            return None
+
+        payload, tag = raw[:-TAG_BYTES], raw[-TAG_BYTES:]
+        if not hmac.compare_digest(tag, self._tag(payload)):
+            return None
+        return int.from_bytes(payload[:QUESTION_ID_BYTES], "big"), payload[QUESTION_ID_BYTES]
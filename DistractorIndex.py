@@ -0,0 +1,152 @@
+"""Индекс неверных вариантов ответа для викторины.
+
+Переводы хранятся в памяти, сгруппированные по первой букве и длине:
+неверные варианты берутся из группы правильного ответа ("red" -> "rose",
+"rice"), а если в ней мало слов - из групп той же буквы, той же длины и
+затем из всех переводов. Выбор вариантов - несколько random.sample по
+готовым спискам, без запросов к БД.
+
+Индекс загружается из БД в фоне при запуске бота (QuizEngine.start), раз в
+refresh_interval догружает новые слова, а слова, добавленные через бота,
+учитываются сразу. Пока индекс загружается, вопросы получают варианты из уже
+загруженной части.
+Чтобы не читать всю таблицу при каждом запуске, его можно построить заранее
+и указать файл в переменной окружения DISTRACTOR_INDEX:
+    python DistractorIndex.py build distractors.json
+После загрузки снимка из БД догружаются только слова, добавленные позже.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def _letter(translation):
+    return translation[:1].lower()
+
+
+def _length_band(translation):
+    """Группа длины: 1-2, 3-5, 6-8, 9-11, 12+ символов"""
+    return min(len(translation) // 3, 4)
+
+
+class DistractorIndex:
+    def __init__(self):
+        self._all = []
+        self._by_group = {}
+        self._by_letter = {}
+        self._by_band = {}
+        self._known = set()
+        self.max_word_id = 0
+        self.refreshed_at = None
+        # Курсор догрузки двигается только refresh() и load(): слова, добавленные
+        # другими процессами с меньшими id, не будут пропущены
+        self._loaded_id = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._all)
+
+    def add(self, word_id, translation):
+        """Добавляет перевод в индекс (повторы игнорируются)"""
+        self.max_word_id = max(self.max_word_id, word_id)
+        if translation in self._known:
+            return
+        self._known.add(translation)
+        letter, band = _letter(translation), _length_band(translation)
+        self._all.append(translation)
+        self._by_group.setdefault((letter, band), []).append(translation)
+        self._by_letter.setdefault(letter, []).append(translation)
+        self._by_band.setdefault(band, []).append(translation)
+
+    async def refresh(self, db):
+        """Догружает переводы слов, появившихся после последнего обновления"""
+        async with self._lock:
+            async for word_id, translation in db.iter_translations(self._loaded_id):
+                self.add(word_id, translation)
+                self._loaded_id = word_id
+            self.refreshed_at = time.monotonic()
+
+    def sample(self, correct, k=3):
+        """Возвращает до k различных переводов, похожих на correct и не совпадающих с ним"""
+        letter, band = _letter(correct), _length_band(correct)
+        groups = (
+            self._by_group.get((letter, band)),
+            self._by_letter.get(letter),
+            self._by_band.get(band),
+            self._all,
+        )
+        picked = []
+        for group in groups:
+            if not group:
+                continue
+            for translation in random.sample(group, min(k + 1 + len(picked), len(group))):
+                if translation != correct and translation not in picked:
+                    picked.append(translation)
+                    if len(picked) == k:
+                        return picked
+        return picked
+
+    # ==================== СНИМОК ====================
+    def save(self, path):
+        """Сохраняет индекс в JSON (атомарно, через временный файл)"""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "loaded_id": self._loaded_id,
+            "max_word_id": self.max_word_id,
+            "translations": self._all,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Загружает снимок; False, если файла нет или его формат устарел"""
+        try:
+            with open(path, encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            logger.warning(f"Снимок индекса вариантов {path} не найден, индекс будет загружен из БД")
+            return False
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"Снимок индекса вариантов {path} устарел, индекс будет загружен из БД")
+            return False
+
+        for translation in snapshot["translations"]:
+            self.add(0, translation)
+        self.max_word_id = max(self.max_word_id, snapshot["max_word_id"])
+        self._loaded_id = snapshot["loaded_id"]
+        logger.info(f"Загружен индекс вариантов: {len(self)} переводов до id {self._loaded_id}")
+        return True
+
+
+async def build(path):
+    from DatabaseManeger import DatabaseManager
+
+    db = DatabaseManager()
+    try:
+        index = DistractorIndex()
+        started_at = time.perf_counter()
+        await index.refresh(db)
+        index.save(path)
+        logger.info(f"Индекс вариантов сохранен в {path}: {len(index)} переводов "
+                    f"за {time.perf_counter() - started_at:.1f} с")
+    finally:
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Индекс неверных вариантов ответа викторины")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="построить снимок индекса из БД")
+    build_parser.add_argument("path", help="файл снимка (JSON)")
+    args = parser.parse_args()
+    asyncio.run(build(args.path))
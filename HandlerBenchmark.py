@@ -0,0 +1,240 @@
+"""Воспроизводимый бенчмарк обработчиков бота.
+
+Обработчики VocabularyBot вызываются через Application.process_update с
+синтетическими объектами Update, запросы к Telegram API обслуживает заглушка
+FakeTelegramRequest. БД (из DATABASE_URL) предварительно наполняется словарями
+--users пользователей по --words слов. Каждая команда замеряется отдельно:
+--iterations обновлений, не больше --concurrency одновременно. Для каждой
+команды выводятся пропускная способность, p50/p95/p99 задержки и число
+SQL-запросов на обновление.
+
+Результаты можно сохранить в JSON и сравнить с предыдущим прогоном; при
+росте p95 больше чем на --threshold процесс завершается с кодом 1:
+    DATABASE_URL=sqlite:///bench.db python HandlerBenchmark.py --save before.json
+    DATABASE_URL=sqlite:///bench.db python HandlerBenchmark.py --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from telegram import Update
+
+from Benchmark import BASE_USER_ID, percentile
+from LoadGenerator import FakeTelegramRequest, UpdateFactory, reply_buttons
+
+logger = logging.getLogger(__name__)
+
+# Команда бенчмарка -> обработчик, который она замеряет (имя в Metrics)
+HANDLERS = {
+    "start": "start",
+    "stats": "show_stats",
+    "list": "list_words",
+    "page": "handle_button_click",
+    "quiz": "quiz",
+    "answer": "handle_button_click",
+    "add": "add_word",
+    "remove": "remove_word",
+}
+COMMANDS = list(HANDLERS)
+# Рост задержки меньше этого порога (секунды) считается шумом
+MIN_REGRESSION = 0.001
+
+
+# ==================== СЦЕНАРИИ КОМАНД ====================
+class Scenario:
+    """Готовит обновление для замера команды (и выполняет подготовительные шаги)"""
+
+    def __init__(self, bot, transport):
+        self.bot = bot
+        self.transport = transport
+        self.factory = UpdateFactory()
+
+    async def process(self, data):
+        await self.bot.application.process_update(Update.de_json(data, self.bot.application.bot))
+
+    async def _click(self, user_id, command, prefix, iteration):
+        """Отправляет команду без замера и возвращает нажатие на ее кнопку с префиксом prefix"""
+        await self.process(self.factory.message(user_id, command))
+        reply = self.transport.last_replies.get(user_id, {})
+        candidates = [data for data in reply_buttons(reply) if data.startswith(prefix)]
+        if not candidates:
+            return None
+        return self.factory.callback(user_id, random.choice(candidates), iteration)
+
+    async def prepare(self, command, user_id, iteration):
+        if command == "start":
+            return self.factory.message(user_id, "/start")
+        if command == "stats":
+            return self.factory.message(user_id, "/stats")
+        if command == "list":
+            return self.factory.message(user_id, "/list")
+        if command == "page":
+            return await self._click(user_id, "/list", "page_", iteration)
+        if command == "quiz":
+            return self.factory.message(user_id, "/quiz")
+        if command == "answer":
+            return await self._click(user_id, "/quiz", "a", iteration)
+        if command == "add":
+            return self.factory.message(user_id, f"/add бенчмарк{iteration} benchmark{iteration}")
+        if command == "remove":
+            return self.factory.message(user_id, f"/remove бенчмарк{iteration}")
+        raise ValueError(f"Неизвестная команда: {command}")
+
+
+# ==================== ПРОГОН ====================
+async def seed(db, users, words, rng):
+    """Наполняет словари пользователей: каждому - words случайных слов из общего пула"""
+    pool = [(f"слово{i}", f"word{i}") for i in range(words * 4)]
+    for i in range(users):
+        await db.import_words(BASE_USER_ID + i, rng.sample(pool, min(words, len(pool))))
+
+
+def _handler_counters(metrics, name):
+    handler = metrics.handlers.get(name)
+    return (handler.calls, handler.statements) if handler else (0, 0)
+
+
+async def measure(scenario, command, users, iterations, concurrency):
+    """Замеряет одну команду, возвращает словарь результатов"""
+    queue = asyncio.Queue()
+    for iteration in range(iterations):
+        queue.put_nowait(iteration)
+    latencies = []
+    calls_before, statements_before = _handler_counters(scenario.bot.metrics, HANDLERS[command])
+    busy = 0.0
+
+    async def worker():
+        nonlocal busy
+        while not queue.empty():
+            iteration = queue.get_nowait()
+            user_id = BASE_USER_ID + iteration % users
+            update = await scenario.prepare(command, user_id, iteration)
+            if update is None:
+                continue
+            started_at = time.perf_counter()
+            await scenario.process(update)
+            latency = time.perf_counter() - started_at
+            latencies.append(latency)
+            busy += latency
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    count = len(latencies)
+    # SQL считается по замеряемому обработчику, без подготовительных команд
+    calls, statements = _handler_counters(scenario.bot.metrics, HANDLERS[command])
+    calls -= calls_before
+    statements -= statements_before
+    return {
+        "count": count,
+        # Время подготовительных шагов в пропускную способность не входит
+        "throughput": count / busy * concurrency if busy else 0.0,
+        "mean": sum(latencies) / count if count else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "sql_per_update": statements / calls if calls else 0.0,
+        "elapsed": elapsed,
+    }
+
+
+def report(results):
+    print(f"\n{'команда':<8} {'n':>6} {'обн/с':>8} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'SQL':>6}")
+    for command, result in results["commands"].items():
+        print(f"{command:<8} {result['count']:>6} {result['throughput']:>8.1f} "
+              f"{result['p50'] * 1000:>8.1f} {result['p95'] * 1000:>8.1f} {result['p99'] * 1000:>8.1f} "
+              f"{result['sql_per_update']:>6.1f}")
+
+
+def compare(results, baseline, threshold):
+    """Сравнивает p95 с предыдущим прогоном, возвращает список регрессировавших команд"""
+    regressions = []
+    print(f"\nсравнение p95 с {baseline['meta']['started_at']}:")
+    for command, result in results["commands"].items():
+        old = baseline["commands"].get(command)
+        if not old or not old["p95"]:
+            continue
+        change = result["p95"] / old["p95"] - 1
+        regressed = change > threshold and result["p95"] - old["p95"] > MIN_REGRESSION
+        if regressed:
+            regressions.append(command)
+        print(f"  {command:<8} {old['p95'] * 1000:8.1f} -> {result['p95'] * 1000:8.1f} мс "
+              f"({change:+.0%}){'  РЕГРЕССИЯ' if regressed else ''}")
+    return regressions
+
+
+async def main(args):
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:benchmark")
+    # Синтетические пользователи действуют быстрее живых, ограничение частоты им не нужно
+    os.environ.setdefault("RATE_LIMIT", "0")
+    from VocabularyBot import VocabularyBot
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    transport = FakeTelegramRequest()
+    bot = VocabularyBot(request=transport)
+    application = bot.application
+
+    await application.initialize()
+    await application.post_init(application)
+    try:
+        await seed(bot.db, args.users, args.words, rng)
+        scenario = Scenario(bot, transport)
+        results = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "backend": bot.db.backend,
+                "python": platform.python_version(),
+                "users": args.users,
+                "words": args.words,
+                "iterations": args.iterations,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+            },
+            "commands": {},
+        }
+        for command in args.commands:
+            results["commands"][command] = await measure(
+                scenario, command, args.users, args.iterations, args.concurrency
+            )
+    finally:
+        await application.post_shutdown(application)
+        await application.shutdown()
+        bot.db.engine.dispose()
+
+    report(results)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\nРегрессия p95: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк обработчиков бота с заглушкой Telegram API")
+    parser.add_argument("--users", type=int, default=100, help="число пользователей в БД")
+    parser.add_argument("--words", type=int, default=200, help="слов в словаре каждого пользователя")
+    parser.add_argument("--iterations", type=int, default=500, help="обновлений на команду")
+    parser.add_argument("--concurrency", type=int, default=10, help="одновременных обновлений")
+    parser.add_argument("--commands", nargs="+", choices=COMMANDS, default=COMMANDS)
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора случайных чисел")
+    parser.add_argument("--save", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="сравнить с результатами из JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост p95 (доля)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
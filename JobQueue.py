@@ -0,0 +1,131 @@
+"""Фоновые задания для тяжелых команд.
+
+Импорт и экспорт словаря выполняются не в обработчике, а заданиями в
+ограниченной очереди: обработчик ставит задание и сразу отвечает, результат
+задание отправляет в чат само. Одновременно выполняется не больше workers
+заданий, поэтому массовые операции не занимают весь пул соединений с БД и не
+задерживают ответы на кнопки викторины. Блокирующие части заданий (разбор и
+запись файлов) выполняются в пуле потоков executor размером threads.
+
+При остановке close() перестает принимать задания, отменяет еще не начатые,
+ждет выполняемые не дольше shutdown_timeout секунд и прерывает оставшиеся.
+Для отмененных заданий вызывается on_cancel, переданный в submit, - например,
+чтобы сообщить пользователю, что команду нужно повторить.
+
+Показатели очереди (число ожидающих и выполняемых заданий, суммарное время
+ожидания) доступны через stats() для Metrics.add_gauges.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    def __init__(self, workers=2, max_pending=100, threads=2, shutdown_timeout=30.0):
+        self.workers = workers
+        self.shutdown_timeout = shutdown_timeout
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._worker_tasks = []
+        # Ключи поставленных и выполняемых заданий (например, (user_id, "import"))
+        self._active = set()
+        self._closing = False
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.wait_seconds = 0.0
+
+    def is_active(self, key):
+        """True, если задание с таким ключом уже ждет в очереди или выполняется"""
+        return key in self._active
+
+    def submit(self, key, name, job, on_cancel=None):
+        """Ставит задание в очередь: job - корутинная функция без аргументов.
+
+        on_cancel - корутинная функция без аргументов, вызываемая, если задание
+        отменено при остановке очереди. Возвращает False, если очередь
+        заполнена или останавливается.
+        """
+        if self._closing:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((key, name, job, on_cancel, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self._active.add(key)
+        return True
+
+    async def _cancelled(self, name, on_cancel):
+        self.cancelled += 1
+        logger.warning(f"Фоновое задание {name} отменено при остановке")
+        if on_cancel is None:
+            return
+        try:
+            await on_cancel()
+        except Exception as e:
+            logger.error(f"Ошибка при уведомлении об отмене задания {name}: {e}")
+
+    async def _worker(self):
+        while True:
+            key, name, job, on_cancel, queued_at = await self._queue.get()
+            self.wait_seconds += time.perf_counter() - queued_at
+            self.running += 1
+            try:
+                await job()
+                self.completed += 1
+            except asyncio.CancelledError:
+                await self._cancelled(name, on_cancel)
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Ошибка фонового задания {name}: {e}")
+            finally:
+                self.running -= 1
+                self._active.discard(key)
+                self._queue.task_done()
+
+    async def start(self):
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Останавливает очередь (повторный вызов безопасен).
+
+        Не начатые задания отменяются сразу, выполняемые получают
+        shutdown_timeout секунд на завершение, после чего прерываются.
+        """
+        self._closing = True
+        while not self._queue.empty():
+            key, name, job, on_cancel, queued_at = self._queue.get_nowait()
+            await self._cancelled(name, on_cancel)
+            self._active.discard(key)
+            self._queue.task_done()
+
+        if self._worker_tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Прерываются фоновые задания, не завершившиеся за {self.shutdown_timeout} с: "
+                               f"{self.running}")
+            for task in self._worker_tasks:
+                task.cancel()
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+            self._worker_tasks = []
+        self.executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            "pending": self._queue.qsize(),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "wait_seconds_total": self.wait_seconds,
+        }
@@ -0,0 +1,242 @@
+"""Нагрузочный тест бота в режиме webhook без доступа к сети.
+
+Бот запускается в этом же процессе со встроенным HTTP-сервером webhook на
+127.0.0.1, а запросы к Telegram API обслуживает FakeTelegramRequest: он
+отвечает заглушками и запоминает отправленные сообщения. Виртуальные
+пользователи отправляют POST с синтетическими обновлениями (команды, текст,
+ответы на вопросы викторины) и ждут ответа бота в свой чат, как живой
+пользователь, поэтому задержка считается от отправки обновления до ответа.
+
+БД берется из DATABASE_URL, для тестовых стендов удобен SQLite:
+    DATABASE_URL=sqlite:///load.db python LoadGenerator.py --users 50 --actions 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+
+import httpx
+from telegram.request import BaseRequest
+
+from Benchmark import BASE_USER_ID, percentile
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "VocabularyBot", "username": "vocabulary_bot"}
+# Методы API, которыми бот отвечает пользователю
+REPLY_METHODS = {"sendMessage", "editMessageText", "sendDocument"}
+
+
+# ==================== ЗАГЛУШКА TELEGRAM API ====================
+class FakeTelegramRequest(BaseRequest):
+    """Транспорт Telegram API, который отвечает локально и не ходит в сеть"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._message_id = 0
+        # chat_id -> параметры последнего ответа бота в этот чат
+        self.last_replies = {}
+        # chat_id -> (Future, число ожидаемых ответов, полученные ответы)
+        self._waiters = {}
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def wait_replies(self, chat_id, count=1):
+        """Future со списком параметров следующих count ответов бота в чат chat_id"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id] = (future, count, [])
+        return future
+
+    def _on_reply(self, chat_id, params):
+        waiter = self._waiters.get(chat_id)
+        if waiter is None:
+            return
+        future, count, replies = waiter
+        replies.append(params)
+        if len(replies) >= count:
+            del self._waiters[chat_id]
+            if not future.done():
+                future.set_result(replies)
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.calls[api_method] += 1
+
+        if api_method == "getMe":
+            result = BOT_USER
+        elif api_method in REPLY_METHODS:
+            self._message_id += 1
+            result = {
+                "message_id": params.get("message_id", self._message_id),
+                "date": int(time.time()),
+                "chat": {"id": params["chat_id"], "type": "private"},
+                "text": params.get("text", ""),
+            }
+            self.last_replies[params["chat_id"]] = params
+            self._on_reply(params["chat_id"], params)
+        else:
+            result = True
+
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+# ==================== СИНТЕТИЧЕСКИЕ ОБНОВЛЕНИЯ ====================
+class UpdateFactory:
+    def __init__(self):
+        self._update_id = 0
+
+    def _next_id(self):
+        self._update_id += 1
+        return self._update_id
+
+    @staticmethod
+    def _user(user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def message(self, user_id, text):
+        update_id = self._next_id()
+        message = {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": update_id, "message": message}
+
+    def callback(self, user_id, data, message_id):
+        update_id = self._next_id()
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "text": "",
+                },
+            },
+        }
+
+
+# ==================== НАГРУЗКА ====================
+def reply_buttons(reply):
+    """callback_data кнопок из параметров ответа бота"""
+    markup = reply.get("reply_markup")
+    if isinstance(markup, str):
+        markup = json.loads(markup)
+    if not markup:
+        return []
+    return [button["callback_data"] for row in markup.get("inline_keyboard", []) for button in row]
+
+
+async def simulate(client, url, transport, users, actions, secret=None):
+    """users пользователей выполняют по actions действий, дожидаясь ответа на каждое"""
+    factory = UpdateFactory()
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    latencies = {}
+
+    async def send(user_id, name, update, replies=1):
+        waiter = transport.wait_replies(user_id, replies)
+        started_at = time.perf_counter()
+        response = await client.post(url, json=update, headers=headers)
+        response.raise_for_status()
+        result = await asyncio.wait_for(waiter, timeout=30)
+        latencies.setdefault(name, []).append(time.perf_counter() - started_at)
+        return result[-1]
+
+    async def user(user_id):
+        for action_no in range(actions):
+            action = random.choice(["quiz", "quiz", "stats", "list", "add"])
+            if action == "add":
+                await send(user_id, "add", factory.message(user_id, f"слово{action_no} word{action_no}"))
+            elif action == "quiz":
+                question = await send(user_id, "quiz", factory.message(user_id, "/quiz"))
+                buttons = reply_buttons(question)
+                if buttons:
+                    # Ответ: правка сообщения с вопросом и предложение продолжить
+                    await send(user_id, "answer", factory.callback(user_id, random.choice(buttons), action_no), 2)
+            else:
+                await send(user_id, action, factory.message(user_id, f"/{action}"))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(user(BASE_USER_ID + i) for i in range(users)))
+    return latencies, time.perf_counter() - started_at
+
+
+def report(latencies, elapsed, transport):
+    all_values = sorted(v for values in latencies.values() for v in values)
+    print(f"\nобновлений: {len(all_values)}, время: {elapsed:.2f} с, "
+          f"пропускная способность: {len(all_values) / elapsed:.1f} обн/с")
+    for name, values in sorted(latencies.items()) + [("all", all_values)]:
+        values = sorted(values)
+        print(f"  {name:<6} p50={percentile(values, 50) * 1000:8.1f} мс  "
+              f"p99={percentile(values, 99) * 1000:8.1f} мс  n={len(values)}")
+    print(f"  вызовы API: {dict(transport.calls)}")
+
+
+async def main(args):
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:load-generator")
+    # Синтетические пользователи действуют быстрее живых, ограничение частоты им не нужно
+    os.environ.setdefault("RATE_LIMIT", "0")
+    os.environ["WEBHOOK_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["WEBHOOK_PORT"] = str(args.port)
+    os.environ["WEBHOOK_LISTEN"] = "127.0.0.1"
+    if args.concurrent_updates:
+        os.environ["CONCURRENT_UPDATES"] = str(args.concurrent_updates)
+
+    from VocabularyBot import VocabularyBot
+
+    transport = FakeTelegramRequest()
+    bot = VocabularyBot(request=transport)
+    application = bot.application
+    options = bot.webhook_options()
+
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_webhook(**options)
+    await application.start()
+    try:
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=args.users)) as client:
+            url = f"http://127.0.0.1:{args.port}/{options['url_path']}"
+            latencies, elapsed = await simulate(
+                client, url, transport, args.users, args.actions, options["secret_token"]
+            )
+        report(latencies, elapsed, transport)
+        print(f"\n{bot.metrics.summary()}")
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.post_shutdown(application)
+        await application.shutdown()
+        bot.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузка на webhook бота синтетическими обновлениями")
+    parser.add_argument("--users", type=int, default=50, help="число одновременных пользователей")
+    parser.add_argument("--actions", type=int, default=20, help="действий на пользователя")
+    parser.add_argument("--port", type=int, default=8081, help="порт локального webhook")
+    parser.add_argument("--concurrent-updates", type=int, default=0,
+                        help="ограничение параллельной обработки (по умолчанию CONCURRENT_UPDATES)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,213 @@
+"""Метрики обработчиков бота.
+
+Для каждого обработчика собираются гистограмма задержки, число неудачных
+вызовов, число SQL-запросов и время, проведенное в БД. Запросы считаются по
+событиям движков SQLAlchemy и относятся к обработчику, в контексте которого
+выполнялись (ContextVar переживает await и переход в greenlet драйвера).
+Запросы вне обработчиков (фоновые задачи) учитываются под именем background.
+
+Метрики доступны в текстовом формате Prometheus: командой /metrics для
+администраторов и по HTTP на порту METRICS_PORT (если задан).
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержки, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND = "background"
+
+
+class _Call:
+    """Счетчики одного вызова обработчика"""
+    __slots__ = ("statements", "db_seconds", "failed", "finished")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.failed = False
+        self.finished = False
+
+
+_current_call = ContextVar("current_call", default=None)
+
+
+class HandlerMetrics:
+    __slots__ = ("buckets", "latency_sum", "calls", "errors", "statements", "db_seconds", "dropped")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.dropped = 0
+
+    def observe(self, latency, call):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                break
+        self.latency_sum += latency
+        self.calls += 1
+        self.errors += call.failed
+        self.statements += call.statements
+        self.db_seconds += call.db_seconds
+
+
+class _ErrorHandler(logging.Handler):
+    """Отмечает вызов обработчика неудачным, если в нем записана ошибка в лог"""
+
+    def emit(self, record):
+        call = _current_call.get()
+        if call is not None:
+            call.failed = True
+
+
+class Metrics:
+    def __init__(self):
+        self.handlers = {}
+        # имя -> функция, возвращающая словарь текущих значений (кэши и т.п.)
+        self._gauges = {}
+        self._error_handler = _ErrorHandler(logging.ERROR)
+        logging.getLogger().addHandler(self._error_handler)
+
+    def _handler(self, name):
+        metrics = self.handlers.get(name)
+        if metrics is None:
+            metrics = self.handlers[name] = HandlerMetrics()
+        return metrics
+
+    # ==================== СБОР ====================
+    def track(self, name, callback):
+        """Оборачивает обработчик: замер задержки, ошибок и запросов к БД"""
+
+        @wraps(callback)
+        async def wrapper(*args, **kwargs):
+            call = _Call()
+            token = _current_call.set(call)
+            started_at = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except Exception:
+                call.failed = True
+                raise
+            finally:
+                call.finished = True
+                _current_call.reset(token)
+                self._handler(name).observe(time.perf_counter() - started_at, call)
+
+        return wrapper
+
+    def drop(self, name):
+        """Учитывает обновление, отброшенное до вызова обработчика"""
+        self._handler(name).dropped += 1
+
+    def add_gauges(self, name, source):
+        """Регистрирует источник показателей: source() возвращает словарь {показатель: число}"""
+        self._gauges[name] = source
+
+    def instrument_engine(self, engine):
+        """Подписывается на события выполнения SQL синхронного движка (для async - engine.sync_engine)"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        call = _current_call.get()
+        # Задачи, запущенные из обработчика, наследуют его контекст и могут пережить вызов
+        if call is None or call.finished:
+            background = self._handler(BACKGROUND)
+            background.statements += 1
+            background.db_seconds += elapsed
+        else:
+            call.statements += 1
+            call.db_seconds += elapsed
+
+    # ==================== ВЫВОД ====================
+    def render(self):
+        """Метрики в текстовом формате Prometheus"""
+        lines = [
+            "# HELP bot_handler_latency_seconds Задержка обработчиков",
+            "# TYPE bot_handler_latency_seconds histogram",
+        ]
+        for name, metrics in sorted(self.handlers.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                cumulative += count
+                lines.append(f'bot_handler_latency_seconds_bucket{{handler="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'bot_handler_latency_seconds_bucket{{handler="{name}",le="+Inf"}} {metrics.calls}')
+            lines.append(f'bot_handler_latency_seconds_sum{{handler="{name}"}} {metrics.latency_sum:.6f}')
+            lines.append(f'bot_handler_latency_seconds_count{{handler="{name}"}} {metrics.calls}')
+
+        counters = [
+            ("bot_handler_errors_total", "Неудачные вызовы обработчиков", "errors"),
+            ("bot_handler_db_statements_total", "SQL-запросы обработчиков", "statements"),
+            ("bot_handler_db_seconds_total", "Время обработчиков в БД, секунды", "db_seconds"),
+            ("bot_handler_dropped_total", "Обновления, отброшенные ограничением частоты", "dropped"),
+        ]
+        for metric, help_text, field in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, metrics in sorted(self.handlers.items()):
+                lines.append(f'{metric}{{handler="{name}"}} {getattr(metrics, field):g}')
+
+        for name, source in sorted(self._gauges.items()):
+            for key, value in source().items():
+                lines.append(f"# TYPE bot_{name}_{key} gauge")
+                lines.append(f"bot_{name}_{key} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Краткая сводка по обработчикам для команды /metrics"""
+        lines = []
+        for name, metrics in sorted(self.handlers.items()):
+            if not metrics.calls:
+                lines.append(
+                    f"{name}: отброшено {metrics.dropped}, SQL {metrics.statements}, "
+                    f"БД {metrics.db_seconds * 1000:.1f} мс"
+                )
+                continue
+            calls = metrics.calls
+            lines.append(
+                f"{name}: вызовов {metrics.calls}, ошибок {metrics.errors}, отброшено {metrics.dropped}, "
+                f"ср. {metrics.latency_sum / calls * 1000:.1f} мс, "
+                f"SQL {metrics.statements / calls:.1f}/вызов, БД {metrics.db_seconds / calls * 1000:.1f} мс/вызов"
+            )
+        for name, source in sorted(self._gauges.items()):
+            lines.append(f"{name}: " + ", ".join(f"{key} {value:g}" for key, value in source().items()))
+        return "\n".join(lines) or "Метрик пока нет"
+
+    async def start_http_server(self, host, port):
+        """HTTP-сервер, отдающий render() на любой GET-запрос"""
+
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+                body = self.render().encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+        return server
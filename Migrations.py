@@ -0,0 +1,126 @@
+"""Создание и обновление схемы БД.
+
+Таблицы создаются по моделям BaseModel, недостающие колонки и индексы
+существующих таблиц добавляются отдельно. Перед созданием уникального
+индекса по паре слов дубликаты в words объединяются. Все шаги идемпотентны,
+поэтому upgrade() можно вызывать при каждом запуске.
+
+Ручной запуск:
+    python Migrations.py
+"""
+import logging
+
+from sqlalchemy import inspect, text, select, update, delete, func
+
+import Partitioning
+from BaseModel import Base, Word, UserWord, IgnoreWord
+
+logger = logging.getLogger(__name__)
+
+# Колонки, появившиеся после создания таблиц: (таблица, колонка, определение)
+ADDED_COLUMNS = [
+    ("user_words", "added_at", "TIMESTAMP"),
+    ("user_words", "ease", "FLOAT NOT NULL DEFAULT 2.5"),
+    ("user_words", "interval_days", "INTEGER NOT NULL DEFAULT 0"),
+    ("user_words", "repetitions", "INTEGER NOT NULL DEFAULT 0"),
+    # Существующие слова становятся доступны для повторения сразу
+    ("user_words", "due_at", "TIMESTAMP NOT NULL DEFAULT '2000-01-01 00:00:00'"),
+]
+
+
+def _add_missing_columns(conn, partitions=None):
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table_name, column, definition in ADDED_COLUMNS:
+        tables = partitions.physical_tables(table_name) if partitions else [table_name]
+        for table in tables:
+            if table not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+                logger.info(f"Добавлена колонка {table}.{column}")
+
+
+def _merge_duplicate_words(conn):
+    """Объединяет повторяющиеся пары (target_word, translate_word) в одну строку.
+
+    Остается строка с наименьшим id, ссылки из user_words и ignore_words
+    переносятся на нее. У каждого пользователя остается одна ссылка на слово,
+    флаг passed_word при этом объединяется.
+    """
+    groups = conn.execute(
+        select(Word.target_word, Word.translate_word, func.min(Word.id))
+        .group_by(Word.target_word, Word.translate_word)
+        .having(func.count() > 1)
+    ).all()
+
+    for target_word, translate_word, keep_id in groups:
+        duplicate_ids = conn.scalars(
+            select(Word.id).where(
+                Word.target_word == target_word,
+                Word.translate_word == translate_word,
+                Word.id != keep_id
+            )
+        ).all()
+        all_ids = [keep_id] + duplicate_ids
+
+        # Слово считается изученным, если изучена любая из копий
+        conn.execute(
+            update(UserWord).where(
+                UserWord.word_id.in_(all_ids),
+                UserWord.user_id.in_(
+                    select(UserWord.user_id).where(
+                        UserWord.word_id.in_(all_ids),
+                        UserWord.passed_word.is_(True)
+                    )
+                )
+            ).values(passed_word=True)
+        )
+
+        for model in (UserWord, IgnoreWord):
+            # Для каждого пользователя оставляем одну ссылку на группу слов
+            conn.execute(
+                delete(model).where(
+                    model.word_id.in_(all_ids),
+                    model.id.not_in(
+                        select(func.min(model.id)).where(model.word_id.in_(all_ids)).group_by(model.user_id)
+                    )
+                )
+            )
+            conn.execute(update(model).where(model.word_id.in_(duplicate_ids)).values(word_id=keep_id))
+
+        conn.execute(delete(Word).where(Word.id.in_(duplicate_ids)))
+
+    if groups:
+        logger.info(f"Объединено повторяющихся слов: {len(groups)}")
+
+
+def _create_missing_indexes(conn):
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                if index.name == "idx_word_pair":
+                    _merge_duplicate_words(conn)
+                index.create(conn)
+                logger.info(f"Создан индекс {index.name}")
+
+
+def upgrade(engine, partitions=None):
+    """Приводит схему БД к текущим моделям и схеме секционирования partitions (Partitioning.UserPartitions)"""
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _add_missing_columns(conn, partitions)
+        _create_missing_indexes(conn)
+        if partitions is not None:
+            Partitioning.ensure_layout(conn, partitions)
+
+
+if __name__ == "__main__":
+    from DatabaseManeger import DatabaseManager
+
+    db = DatabaseManager()
+    upgrade(db.engine, db.partitions)
+    logger.info("Схема БД обновлена")
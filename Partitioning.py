@@ -0,0 +1,235 @@
+"""Секционирование пользовательских данных по user_id.
+
+Таблицы user_words и ignore_words можно разбить на USER_PARTITIONS секций
+по хешу user_id (0 или 1 - без секционирования):
+  PostgreSQL - родное секционирование PARTITION BY HASH (user_id): секции
+               user_words_p0..pN-1, запросы идут к родительской таблице, а
+               планировщик по условию user_id = ... читает одну секцию;
+  SQLite     - эмуляция: отдельные таблицы user_words_p0..pN-1 с теми же
+               колонками и индексами, DatabaseManager сам выбирает таблицу
+               пользователя (секция = user_id mod N).
+В обоих случаях запрос одного пользователя работает с таблицей и индексами
+размера одной секции.
+
+Схема в БД должна совпадать с USER_PARTITIONS: пустые таблицы приводятся к
+нужной схеме при миграции, таблицы с данными - командой
+    python Partitioning.py repartition 16
+после чего USER_PARTITIONS=16 указывается в окружении бота. Текущая схема и
+число строк в секциях:
+    python Partitioning.py status
+"""
+import argparse
+import logging
+import re
+
+from sqlalchemy import MetaData, inspect, text, select, func
+
+from BaseModel import Word, UserWord, IgnoreWord
+
+logger = logging.getLogger(__name__)
+
+# Секционируемые таблицы
+PARTITIONED_MODELS = (UserWord, IgnoreWord)
+
+
+def partition_name(table_name, partition):
+    return f"{table_name}_p{partition}"
+
+
+class UserPartitions:
+    """Схема секционирования и выбор таблицы пользователя"""
+
+    def __init__(self, backend, count=0):
+        self.backend = backend
+        self.count = count if count > 1 else 0
+        self.native = bool(self.count) and backend == "postgresql"
+        self.emulated = bool(self.count) and not self.native
+        # Таблицы секций SQLite: имя таблицы -> [секция 0, секция 1, ...]
+        self.metadata = MetaData()
+        self._tables = {}
+        if self.emulated:
+            Word.__table__.to_metadata(self.metadata)
+            for model in PARTITIONED_MODELS:
+                self._tables[model.__tablename__] = [
+                    self._partition_table(model.__table__, partition) for partition in range(self.count)
+                ]
+
+    def _partition_table(self, table, partition):
+        copy = table.to_metadata(self.metadata, name=partition_name(table.name, partition))
+        # Имена индексов в SQLite общие для всей БД
+        for index in copy.indexes:
+            index.name = partition_name(index.name, partition)
+        return copy
+
+    def partition(self, user_id):
+        return user_id % self.count
+
+    def user_words(self, user_id):
+        """Таблица user_words, в которой хранятся слова пользователя"""
+        if not self.emulated:
+            return UserWord.__table__
+        return self._tables[UserWord.__tablename__][self.partition(user_id)]
+
+    def ignore_words(self, user_id):
+        """Таблица ignore_words, в которой хранятся игнорируемые слова пользователя"""
+        if not self.emulated:
+            return IgnoreWord.__table__
+        return self._tables[IgnoreWord.__tablename__][self.partition(user_id)]
+
+    def tables(self, table_name=None):
+        """Таблицы секций SQLite (для table_name или всех секционируемых таблиц)"""
+        if table_name is not None:
+            return self._tables.get(table_name, [])
+        return [table for tables in self._tables.values() for table in tables]
+
+    def physical_tables(self, table_name):
+        """Имена таблиц со структурой table_name: базовая и секции SQLite (для миграций колонок)"""
+        return [table_name] + [table.name for table in self.tables(table_name)]
+
+
+# ==================== ТЕКУЩАЯ СХЕМА В БД ====================
+def current_count(conn, table_name):
+    """Число секций таблицы в БД (0 - не секционирована)"""
+    if conn.dialect.name == "postgresql":
+        return conn.scalar(
+            text("SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass(:name)"), {"name": table_name}
+        )
+    pattern = re.compile(rf"^{table_name}_p(\d+)$")
+    return sum(1 for name in inspect(conn).get_table_names() if pattern.match(name))
+
+
+def _source_tables(conn, table_name):
+    """Таблицы с данными table_name в текущей схеме (для SQLite - базовая и секции)"""
+    if conn.dialect.name == "postgresql":
+        return [table_name]
+    count = current_count(conn, table_name)
+    return [table_name] + [partition_name(table_name, partition) for partition in range(count)]
+
+
+def row_counts(conn, table_name):
+    """Число строк в каждой таблице с данными table_name"""
+    if conn.dialect.name == "postgresql":
+        names = conn.scalars(
+            text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(:name) "
+                 "ORDER BY 1"),
+            {"name": table_name}
+        ).all() or [table_name]
+    else:
+        names = _source_tables(conn, table_name)
+    return {name: conn.scalar(select(func.count()).select_from(text(name))) for name in names}
+
+
+# ==================== ПЕРЕСЕКЦИОНИРОВАНИЕ ====================
+def _repartition_postgresql(conn, table, count):
+    name = table.name
+    new_name = f"{name}_repartition"
+    columns = ", ".join(column.name for column in table.columns)
+    partition_clause = " PARTITION BY HASH (user_id)" if count else ""
+
+    conn.execute(text(f"CREATE TABLE {new_name} (LIKE {name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                      f"{partition_clause}"))
+    for partition in range(count):
+        conn.execute(text(f"CREATE TABLE {partition_name(new_name, partition)} PARTITION OF {new_name} "
+                          f"FOR VALUES WITH (MODULUS {count}, REMAINDER {partition})"))
+    conn.execute(text(f"INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {name}"))
+
+    # Последовательность id переходит к новой таблице, иначе удалится вместе со старой
+    sequence = conn.scalar(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": name})
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {new_name}.id"))
+    conn.execute(text(f"DROP TABLE {name} CASCADE"))
+    conn.execute(text(f"ALTER TABLE {new_name} RENAME TO {name}"))
+    for partition in range(count):
+        conn.execute(text(f"ALTER TABLE {partition_name(new_name, partition)} "
+                          f"RENAME TO {partition_name(name, partition)}"))
+
+    # Уникальные ограничения секционированной таблицы должны включать ключ секционирования
+    primary_key = "user_id, id" if count else "id"
+    conn.execute(text(f"ALTER TABLE {name} ADD PRIMARY KEY ({primary_key})"))
+    conn.execute(text(f"ALTER TABLE {name} ADD FOREIGN KEY (word_id) REFERENCES words (id)"))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _repartition_sqlite(conn, table, count):
+    name = table.name
+    new_name = f"{name}_repartition"
+    # id не переносится: у каждой эмулированной секции своя последовательность id,
+    # поэтому при объединении секций id повторяются; строки получают новые id
+    columns = ", ".join(column.name for column in table.columns if column.name != "id")
+    sources = _source_tables(conn, name)
+
+    conn.execute(text(f"CREATE TABLE {new_name} AS "
+                      + " UNION ALL ".join(f"SELECT {columns} FROM {source}" for source in sources)))
+    for source in sources[1:]:
+        conn.execute(text(f"DROP TABLE {source}"))
+    conn.execute(text(f"DELETE FROM {name}"))
+
+    partitions = UserPartitions("sqlite", count)
+    if partitions.emulated:
+        partitions.metadata.create_all(conn, tables=partitions.tables(name))
+        for partition, partition_table in enumerate(partitions.tables(name)):
+            # Остаток приводится к неотрицательному, как в UserPartitions.partition
+            conn.execute(text(f"INSERT INTO {partition_table.name} ({columns}) SELECT {columns} FROM {new_name} "
+                              f"WHERE ((user_id % {count}) + {count}) % {count} = {partition}"))
+    else:
+        conn.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {new_name}"))
+    conn.execute(text(f"DROP TABLE {new_name}"))
+
+
+def repartition(conn, count):
+    """Переносит user_words и ignore_words в схему из count секций (0 или 1 - одна таблица).
+
+    Выполняется в транзакции conn: при ошибке схема и данные остаются прежними
+    (для SQLite транзакционный DDL включает DatabaseManager).
+    """
+    count = count if count > 1 else 0
+    for model in PARTITIONED_MODELS:
+        if conn.dialect.name == "postgresql":
+            _repartition_postgresql(conn, model.__table__, count)
+        else:
+            _repartition_sqlite(conn, model.__table__, count)
+        logger.info(f"Таблица {model.__tablename__} разбита на секций: {count or 1}")
+
+
+def ensure_layout(conn, partitions):
+    """Приводит пустые таблицы к схеме partitions; для таблиц с данными - ошибка"""
+    mismatched = [
+        model.__tablename__ for model in PARTITIONED_MODELS
+        if current_count(conn, model.__tablename__) != partitions.count
+    ]
+    if not mismatched:
+        if partitions.emulated:
+            partitions.metadata.create_all(conn, tables=partitions.tables())
+        return
+
+    if any(sum(row_counts(conn, name).values()) for name in mismatched):
+        raise RuntimeError(
+            f"Секционирование таблиц {', '.join(mismatched)} в БД не совпадает с USER_PARTITIONS="
+            f"{partitions.count}. Перенесите данные: python Partitioning.py repartition {partitions.count}"
+        )
+    repartition(conn, partitions.count)
+
+
+if __name__ == "__main__":
+    from DatabaseManeger import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Секционирование user_words и ignore_words по user_id")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="текущая схема и число строк в секциях")
+    repartition_parser = commands.add_parser("repartition", help="перенести данные в новую схему секций")
+    repartition_parser.add_argument("count", type=int, help="число секций (0 или 1 - без секционирования)")
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    try:
+        with db.engine.begin() as connection:
+            if args.command == "repartition":
+                repartition(connection, args.count)
+                logger.info(f"Готово. Укажите боту USER_PARTITIONS={args.count if args.count > 1 else 0}")
+            else:
+                for model in PARTITIONED_MODELS:
+                    for table_name, rows in row_counts(connection, model.__tablename__).items():
+                        print(f"{table_name}: {rows}")
+    finally:
+        db.engine.dispose()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from BaseModel import utcnow
+from DistractorIndex import DistractorIndex
+from SpacedRepetition import Review
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== ВОПРОС ВИКТОРИНЫ ====================
+@dataclass
+class QuizQuestion:
+    word_id: int
+    target_word: str
+    correct_answer: str
+    options: list
+    is_user_word: bool
+    review: Review = None  # Состояние повторения на момент выборки (для слов пользователя)
+
+
+# ==================== ГЕНЕРАТОР ВОПРОСОВ ====================
+class QuizEngine:
+    """Генератор вопросов викторины: один запрос к БД на вопрос"""
+
+    def __init__(self, db, candidates=5, options=4, refresh_interval=60, distractor_snapshot=None):
+        """distractor_snapshot - файл заранее построенного DistractorIndex (необязательно)"""
+        self.db = db
+        self.candidates = candidates
+        self.options = options
+        self.refresh_interval = refresh_interval
+        self.distractors = DistractorIndex()
+        if distractor_snapshot:
+            self.distractors.load(distractor_snapshot)
+        self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """Загружает индекс вариантов и догружает новые слова раз в refresh_interval секунд"""
+        while True:
+            try:
+                await self.distractors.refresh(self.db)
+            except Exception as e:
+                logger.error(f"Ошибка при обновлении индекса вариантов: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self):
+        """Запускает фоновую загрузку индекса: вопросы не ждут БД, а берут уже загруженные варианты"""
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def on_word_added(self, word):
+        """Учитывает новое слово без обращения к БД"""
+        self.distractors.add(word.id, word.translate_word)
+
+    def _make_question(self, word):
+        options = self.distractors.sample(word.translate_word, self.options - 1) + [word.translate_word]
+        random.shuffle(options)
+
+        review = None
+        if word.is_user_word:
+            review = Review(word.ease, word.interval_days, word.repetitions, bool(word.passed_word))
+
+        return QuizQuestion(
+            word_id=word.id,
+            target_word=word.target_word,
+            correct_answer=word.translate_word,
+            options=options,
+            is_user_word=bool(word.is_user_word),
+            review=review
+        )
+
+    async def _sample_candidates(self, user_id, limit, exclude_ids=()):
+        """Кандидаты в порядке приоритета: слова к повторению, новые слова, остальные слова пользователя"""
+        pivot = random.randint(1, max(self.distractors.max_word_id, 1))
+        rows = await self.db.sample_quiz_words(user_id, pivot, limit)
+
+        # Ветки с переходом через начало диапазона могут пересекаться
+        rows = [row for row in {row.id: row for row in rows}.values() if row.id not in exclude_ids]
+        now = utcnow()
+        due = [row for row in rows if row.is_user_word and row.due_at <= now]
+        shared = [row for row in rows if not row.is_user_word]
+        upcoming = [row for row in rows if row.is_user_word and row.due_at > now]
+        random.shuffle(due)
+        random.shuffle(shared)
+        return due + shared + upcoming
+
+    async def next_question(self, user_id):
+        """Возвращает QuizQuestion или None, если слов для викторины нет"""
+        candidates = await self._sample_candidates(user_id, self.candidates)
+        if not candidates:
+            return None
+        return self._make_question(candidates[0])
+
+    async def build_questions(self, user_id, count, exclude_ids=()):
+        """Возвращает до count вопросов о разных словах за один запрос к БД"""
+        # Исключенные слова не должны вытеснять остальные кандидатов из выборки с LIMIT
+        limit = max(self.candidates, count) + len(exclude_ids)
+        candidates = await self._sample_candidates(user_id, limit, exclude_ids)
+        return [self._make_question(word) for word in candidates[:count]]
+
+
+# ==================== КОЛОДЫ ВОПРОСОВ ====================
+class QuizDecks:
+    """Заранее подготовленные колоды из следующих вопросов для каждого пользователя.
+
+    Следующий вопрос - это извлечение из очереди в памяти. Когда в колоде остается
+    меньше low_watermark вопросов, она пополняется в фоне одним запросом к БД.
+    Колоды хранятся для max_users последних активных пользователей.
+    """
+
+    def __init__(self, engine, size=10, low_watermark=3, max_users=10000):
+        self.engine = engine
+        self.size = size
+        self.low_watermark = low_watermark
+        self.max_users = max_users
+        self._decks = OrderedDict()
+        self._refills = {}
+        # Недавно выданные слова: их ответ может быть еще не оценен, поэтому
+        # пополнение и пересборка колоды не должны вернуть их с устаревшим
+        # состоянием повторения. Сохраняются и после сброса колоды (invalidate)
+        self._recent = OrderedDict()
+
+    def _store(self, user_id, deck):
+        self._decks[user_id] = deck
+        self._decks.move_to_end(user_id)
+        while len(self._decks) > self.max_users:
+            self._decks.popitem(last=False)
+
+    def _remember(self, user_id, word_id):
+        recent = self._recent.get(user_id)
+        if recent is None:
+            recent = self._recent[user_id] = deque(maxlen=self.size)
+        self._recent.move_to_end(user_id)
+        recent.append(word_id)
+        while len(self._recent) > self.max_users:
+            self._recent.popitem(last=False)
+
+    async def pop(self, user_id):
+        """Возвращает следующий вопрос пользователя или None, если слов нет"""
+        deck = self._decks.get(user_id)
+        if deck:
+            self._decks.move_to_end(user_id)
+        else:
+            recent = set(self._recent.get(user_id, ()))
+            deck = deque(await self.engine.build_questions(user_id, self.size, recent))
+            if not deck and recent:
+                # Слов меньше, чем недавно выданных: лучше повтор, чем пустая викторина
+                deck = deque(await self.engine.build_questions(user_id, self.size))
+            if not deck:
+                return None
+            self._store(user_id, deck)
+
+        question = deck.popleft()
+        self._remember(user_id, question.word_id)
+        if len(deck) < self.low_watermark and user_id not in self._refills:
+            task = asyncio.create_task(self._refill(user_id, deck))
+            self._refills[user_id] = task
+            task.add_done_callback(lambda _: self._refills.pop(user_id, None))
+        return question
+
+    async def _refill(self, user_id, deck):
+        exclude_ids = {q.word_id for q in deck} | set(self._recent.get(user_id, ()))
+        try:
+            questions = await self.engine.build_questions(user_id, self.size, exclude_ids)
+        except Exception as e:
+            logger.error(f"Ошибка при пополнении колоды пользователя {user_id}: {e}")
+            return
+
+        # Колода могла быть сброшена или вытеснена, пока шел запрос
+        if self._decks.get(user_id) is not deck:
+            return
+        queued = {q.word_id for q in deck}
+        deck.extend(q for q in questions if q.word_id not in queued)
+
+    def invalidate(self, user_id):
+        """Сбрасывает колоду пользователя (после изменения его словаря)"""
+        self._decks.pop(user_id, None)
+
+    async def close(self):
+        """Отменяет фоновые пополнения"""
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
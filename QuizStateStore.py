@@ -0,0 +1,114 @@
+"""Хранилища состояния заданных вопросов викторины.
+
+Состояние (правильный ответ, id слова и т.п.) нужно, чтобы проверить ответ
+при нажатии кнопки. Хранилище выбирается переменной окружения QUIZ_STATE_STORE:
+  memory   - LRU-словарь в памяти процесса (по умолчанию, один воркер);
+  database - таблица quiz_states, общая для всех воркеров и переживающая
+             перезапуск. Запись буферизуется и сбрасывается пачками.
+Ответ на вопрос забирает состояние методом pop: получение и удаление
+выполняются атомарно, поэтому повторное нажатие кнопки (в том числе в другом
+воркере) не засчитывает ответ второй раз.
+"""
+import abc
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from BaseModel import utcnow
+from BufferedWriter import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== ИНТЕРФЕЙС ХРАНИЛИЩА ====================
+class QuizStateStore(abc.ABC):
+    """Базовый класс хранилища: ключ -> словарь состояния с истечением через ttl секунд"""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+
+    @abc.abstractmethod
+    async def put(self, key, state):
+        """Сохраняет состояние вопроса"""
+
+    @abc.abstractmethod
+    async def pop(self, key):
+        """Атомарно забирает состояние вопроса: None, если его нет, оно истекло или уже забрано"""
+
+    async def start(self):
+        """Запуск фоновых задач хранилища"""
+
+    async def close(self):
+        """Остановка фоновых задач и сохранение несохраненных данных"""
+
+
+# ==================== ХРАНИЛИЩЕ В ПАМЯТИ ====================
+class MemoryQuizStateStore(QuizStateStore):
+    def __init__(self, ttl=3600, max_entries=100000):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+
+    async def pop(self, key):
+        entry = self._states.pop(key, None)
+        if entry is None:
+            return None
+        expires_at, state = entry
+        return state if expires_at >= time.monotonic() else None
+
+    async def put(self, key, state):
+        self._states[key] = (time.monotonic() + self.ttl, state)
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+
+# ==================== ХРАНИЛИЩЕ В БД ====================
+class DatabaseQuizStateStore(BufferedWriter, QuizStateStore):
+    """Хранилище в таблице quiz_states с отложенной пакетной записью.
+
+    put попадает в буфер, который сбрасывается одной транзакцией раз в
+    flush_interval секунд или при накоплении max_batch изменений. pop не
+    буферизуется: состояние забирается из буфера, а если его там нет - одним
+    запросом DELETE ... RETURNING.
+    """
+    flush_error = "Ошибка при сохранении состояний викторины"
+
+    def __init__(self, db, ttl=3600, flush_interval=0.2, max_batch=500):
+        BufferedWriter.__init__(self, flush_interval, max_batch)
+        QuizStateStore.__init__(self, ttl)
+        self.db = db
+        # _pending: key -> (state, expires_at) для записи
+
+    async def pop(self, key):
+        # Состояние может быть в пачке, которая сейчас записывается в БД
+        await self._wait_flush()
+        entry = self._pending.pop(key, None)
+        if entry:
+            return entry[0]
+        payload = await self.db.pop_quiz_state(key)
+        return json.loads(payload) if payload else None
+
+    async def put(self, key, state):
+        self._pending[key] = (state, utcnow() + timedelta(seconds=self.ttl))
+        await self._buffered()
+
+    async def _write(self, pending):
+        await self.db.write_quiz_states([
+            {"key": key, "payload": json.dumps(state), "expires_at": expires_at}
+            for key, (state, expires_at) in pending.items()
+        ])
+
+
+def create_quiz_state_store(db):
+    """Создает хранилище, выбранное переменной окружения QUIZ_STATE_STORE"""
+    kind = os.getenv("QUIZ_STATE_STORE", "memory")
+    ttl = int(os.getenv("QUIZ_STATE_TTL", "3600"))
+    if kind == "database":
+        return DatabaseQuizStateStore(db, ttl=ttl)
+    if kind != "memory":
+        logger.warning(f"Неизвестное хранилище состояний викторины '{kind}', используется memory")
+    return MemoryQuizStateStore(ttl=ttl)
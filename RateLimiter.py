@@ -0,0 +1,52 @@
+"""Ограничение частоты обновлений от пользователя.
+
+TokenBucketLimiter - корзина токенов на пользователя: пользователь может
+отправить до burst обновлений подряд, дальше - не чаще rate в секунду.
+Coalescer - склейка одинаковых обновлений, которые еще обрабатываются:
+повторное нажатие той же кнопки, пока первое не обработано, отбрасывается.
+Обе проверки выполняются в памяти до обращения к БД.
+"""
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate=3.0, burst=10, max_users=10000):
+        """rate <= 0 отключает ограничение"""
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        # user_id -> (токенов осталось, время последнего пересчета)
+        self._buckets = OrderedDict()
+
+    def allow(self, user_id):
+        """Забирает токен пользователя; False, если токенов нет"""
+        if self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[user_id] = (tokens, now)
+        while len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+class Coalescer:
+    def __init__(self):
+        self._in_flight = set()
+
+    def acquire(self, key):
+        """Отмечает обновление key как обрабатываемое; False, если такое уже обрабатывается"""
+        if key in self._in_flight:
+            return False
+        self._in_flight.add(key)
+        return True
+
+    def release(self, key):
+        self._in_flight.discard(key)
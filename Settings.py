@@ -0,0 +1,38 @@
+"""Загрузка конфигурации и настройка логирования.
+
+Переменные окружения из .env загружаются, а логирование настраивается один
+раз на процесс, сколько бы модулей ни вызвали configure().
+"""
+import logging
+import time
+
+# Момент импорта первого модуля приложения: от него считается время запуска
+STARTED_AT = time.perf_counter()
+
+_configured = False
+
+
+def configure():
+    """Загружает .env и настраивает логирование (повторные вызовы ничего не делают)"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        print("Ошибка: Не установлены необходимые зависимости. Установите их командой:")
+        print("pip install python-dotenv")
+        raise
+
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    load_dotenv()
+
+
+def uptime():
+    """Секунды с момента импорта Settings"""
+    return time.perf_counter() - STARTED_AT
@@ -0,0 +1,53 @@
+"""Интервальное повторение по алгоритму SM-2.
+
+Каждое слово пользователя хранит коэффициент легкости (ease), текущий интервал
+в днях и число правильных ответов подряд. После ответа в викторине слово
+получает оценку качества 0-5 и новую дату повторения.
+"""
+from datetime import timedelta
+
+from BaseModel import utcnow
+
+MIN_EASE = 1.3
+# Слово считается изученным, когда интервал повторения достиг трех недель
+LEARNED_INTERVAL_DAYS = 21
+
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+class Review:
+    """Состояние повторения слова пользователя"""
+    __slots__ = ("ease", "interval_days", "repetitions", "passed_word")
+
+    def __init__(self, ease=2.5, interval_days=0, repetitions=0, passed_word=False):
+        self.ease = ease
+        self.interval_days = interval_days
+        self.repetitions = repetitions
+        self.passed_word = passed_word
+
+    def to_list(self):
+        return [self.ease, self.interval_days, self.repetitions, self.passed_word]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+
+def grade(review, quality):
+    """Возвращает (новое состояние Review, дата следующего повторения) по SM-2"""
+    if quality < 3:
+        repetitions = 0
+        interval_days = 1
+    else:
+        if review.repetitions == 0:
+            interval_days = 1
+        elif review.repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = round(review.interval_days * review.ease)
+        repetitions = review.repetitions + 1
+
+    ease = max(MIN_EASE, review.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    graded = Review(ease, interval_days, repetitions, interval_days >= LEARNED_INTERVAL_DAYS)
+    return graded, utcnow() + timedelta(days=interval_days)
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+
+
+# ==================== СТАТИСТИКА ПОЛЬЗОВАТЕЛЯ ====================
+class UserStats:
+    __slots__ = ("total", "learned", "added_week", "loaded_at")
+
+    def __init__(self, total, learned, added_week):
+        self.total = total
+        self.learned = learned
+        self.added_week = added_week
+        self.loaded_at = time.monotonic()
+
+
+# ==================== КЭШ СТАТИСТИКИ ====================
+class StatsCache:
+    """LRU-кэш статистики пользователей с ограниченным временем жизни.
+
+    Запись загружается из БД один раз, после чего поддерживается инкрементально
+    (adjust) при добавлении, удалении и изучении слов. TTL ограничивает
+    расхождение с БД (например, сдвиг окна "за неделю" или изменения,
+    сделанные другим процессом).
+    """
+
+    def __init__(self, max_users=10000, ttl=300):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._stats = OrderedDict()
+
+    def get(self, user_id):
+        """Возвращает UserStats или None, если записи нет или она устарела"""
+        stats = self._stats.get(user_id)
+        if stats is None:
+            return None
+        if time.monotonic() - stats.loaded_at > self.ttl:
+            del self._stats[user_id]
+            return None
+        self._stats.move_to_end(user_id)
+        return stats
+
+    def put(self, user_id, stats):
+        self._stats[user_id] = stats
+        self._stats.move_to_end(user_id)
+        while len(self._stats) > self.max_users:
+            self._stats.popitem(last=False)
+
+    def adjust(self, user_id, total=0, learned=0, added_week=0):
+        """Применяет изменение к закэшированной записи (если она есть)"""
+        stats = self._stats.get(user_id)
+        if stats is not None:
+            stats.total += total
+            stats.learned += learned
+            stats.added_week += added_week
+
+    def invalidate(self, user_id):
+        self._stats.pop(user_id, None)
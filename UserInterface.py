@@ -0,0 +1,144 @@
+"""Клавиатуры и постоянные тексты бота.
+
+Клавиатуры и тексты для каждого языка создаются один раз при запуске и
+переиспользуются во всех ответах: объекты python-telegram-bot после создания
+неизменяемы, поэтому один ReplyKeyboardMarkup можно отправлять сколько угодно
+раз. Язык выбирается по language_code пользователя Telegram, неизвестные языки
+получают язык по умолчанию.
+
+Нажатия кнопок главного меню распознаются по словарю "текст кнопки ->
+действие", общему для всех языков: кнопка, отправленная со старой клавиатурой
+другого языка, тоже распознается.
+"""
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, \
+    ReplyKeyboardRemove
+
+# Действия кнопок главного меню (порядок - порядок кнопок, по две в ряд)
+MENU_ACTIONS = ("add", "remove", "list", "stats", "quiz", "hide")
+CANCEL_ACTION = "cancel"
+
+LOCALES = {
+    "ru": {
+        "buttons": {
+            "add": "➕ Добавить слово",
+            "remove": "🗑️ Удалить слово",
+            "list": "📋 Список слов",
+            "stats": "📊 Статистика",
+            "quiz": "🎯 Викторина",
+            "hide": "❌ Скрыть клавиатуру",
+            "cancel": "Отмена",
+            "continue_quiz": "➡️ Продолжить",
+        },
+        "texts": {
+            "start": (
+                "👋 Привет! Я бот для изучения английских слов.\n\n"
+                "Основные команды:\n"
+                "/add - добавить новое слово\n"
+                "/remove - удалить слово\n"
+                "/quiz - начать викторину\n"
+                "/list - показать все слова\n"
+                "/stats - показать прогресс\n"
+                "/import - загрузить слова из CSV/TSV файла\n"
+                "/export - выгрузить словарь в CSV (/export json - в JSON)\n\n"
+                "Используй кнопки ниже для быстрого доступа:"
+            ),
+            "add_prompt": "📝 Введите слово и перевод через пробел:\nПример: <code>яблоко apple</code>",
+            "add_hint": "Введите слово и перевод через пробел (например: <code>яблоко apple</code>)",
+            "remove_prompt": "🗑 Введите слово, которое хотите удалить:",
+            "remove_hint": "Введите слово, которое хотите удалить:",
+            "keyboard_hidden": "Клавиатура скрыта. Напишите /start для её возврата.",
+            "cancelled": "✖️ Действие отменено",
+            "unknown": "Я не понимаю эту команду. Используйте меню или команды.",
+            "empty": "📭 Ваш словарь пуст! Добавьте слова через /add",
+            "continue_quiz": "Продолжить викторину?",
+        },
+    },
+    "en": {
+        "buttons": {
+            "add": "➕ Add word",
+            "remove": "🗑️ Remove word",
+            "list": "📋 Word list",
+            "stats": "📊 Statistics",
+            "quiz": "🎯 Quiz",
+            "hide": "❌ Hide keyboard",
+            "cancel": "Cancel",
+            "continue_quiz": "➡️ Continue",
+        },
+        "texts": {
+            "start": (
+                "👋 Hi! I am a bot for learning English words.\n\n"
+                "Main commands:\n"
+                "/add - add a new word\n"
+                "/remove - remove a word\n"
+                "/quiz - start a quiz\n"
+                "/list - show all words\n"
+                "/stats - show progress\n"
+                "/import - upload words from a CSV/TSV file\n"
+                "/export - download your vocabulary as CSV (/export json - as JSON)\n\n"
+                "Use the buttons below for quick access:"
+            ),
+            "add_prompt": "📝 Enter a Russian word and its translation separated by a space:\n"
+                          "Example: <code>яблоко apple</code>",
+            "add_hint": "Enter a Russian word and its translation separated by a space "
+                        "(for example: <code>яблоко apple</code>)",
+            "remove_prompt": "🗑 Enter the word you want to remove:",
+            "remove_hint": "Enter the word you want to remove:",
+            "keyboard_hidden": "Keyboard hidden. Send /start to bring it back.",
+            "cancelled": "✖️ Cancelled",
+            "unknown": "I don't understand this command. Use the menu or commands.",
+            "empty": "📭 Your vocabulary is empty! Add words with /add",
+            "continue_quiz": "Continue the quiz?",
+        },
+    },
+}
+
+
+class Locale:
+    """Готовые клавиатуры и тексты одного языка"""
+
+    def __init__(self, code, buttons, texts):
+        self.code = code
+        self.texts = texts
+        self.main_menu = ReplyKeyboardMarkup(
+            [
+                [KeyboardButton(buttons[action]) for action in MENU_ACTIONS[i:i + 2]]
+                for i in range(0, len(MENU_ACTIONS), 2)
+            ],
+            resize_keyboard=True
+        )
+        self.cancel_menu = ReplyKeyboardMarkup([[KeyboardButton(buttons[CANCEL_ACTION])]], resize_keyboard=True)
+        self.hide_keyboard = ReplyKeyboardRemove()
+        self.continue_quiz = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(buttons["continue_quiz"], callback_data="continue_quiz")]]
+        )
+
+
+class UserInterface:
+    def __init__(self, default_locale="ru"):
+        if default_locale not in LOCALES:
+            raise ValueError(f"Неизвестный язык интерфейса: {default_locale}. Доступны: {', '.join(LOCALES)}")
+        self.locales = {code: Locale(code, **locale) for code, locale in LOCALES.items()}
+        self.default = self.locales[default_locale]
+        self._by_code = {}
+        # Текст кнопки (любого языка) -> действие
+        self.actions = {
+            text: action
+            for locale in LOCALES.values()
+            for action, text in locale["buttons"].items()
+            if action in MENU_ACTIONS or action == CANCEL_ACTION
+        }
+
+    def locale(self, user):
+        """Язык пользователя Telegram (по language_code вида "en" или "en-US")"""
+        code = user.language_code if user else None
+        if not code:
+            return self.default
+        locale = self._by_code.get(code)
+        if locale is None:
+            # Кодов языков немного, разбор каждого выполняется один раз
+            locale = self._by_code[code] = self.locales.get(code.split("-", 1)[0].lower(), self.default)
+        return locale
+
+    def route(self, text):
+        """Действие нажатой кнопки меню или None для произвольного текста"""
+        return self.actions.get(text)
@@ -1,136 +1,246 @@
+# Первым: от момента его импорта отсчитывается время запуска
+import Settings
+
+import asyncio
 import logging
 import os
-import random
-
-from dotenv import load_dotenv
+import tempfile
+from functools import wraps
 
-import BaseModel
+import SpacedRepetition
+from AnswerQueue import AnswerQueue
+from CallbackData import CallbackCodec, new_question_id
 from DatabaseManeger import DatabaseManager
+from JobQueue import JobQueue
+from Metrics import Metrics
+from QuizEngine import QuizEngine, QuizDecks
+from QuizStateStore import create_quiz_state_store
+from RateLimiter import TokenBucketLimiter, Coalescer
+from UserInterface import UserInterface
 
 # Проверка зависимостей
 try:
-    import psycopg2
-    from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, text, Index
-    from sqlalchemy.orm import sessionmaker, declarative_base, relationship, close_all_sessions
-    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm import close_all_sessions
 except ImportError as e:
     print("Ошибка: Не установлены необходимые зависимости. Установите их командой:")
-    print("pip install psycopg2-binary sqlalchemy python-dotenv python-telegram-bot")
+    print('pip install sqlalchemy python-dotenv "python-telegram-bot[webhooks]"')
     raise
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove, \
-    KeyboardButton
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, ContextTypes, filters
 
-# Настройка логгирования
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+Settings.configure()
 logger = logging.getLogger(__name__)
 
-# Загрузка переменных окружения
-load_dotenv()
-
 # ==================== ОСНОВНОЙ КЛАСС БОТА ====================
 class VocabularyBot:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.db.initialize_words()
+    def __init__(self, request=None):
+        """request - транспорт запросов к Telegram API (по умолчанию HTTPXRequest)"""
+        # FAST_START=1: подключение к БД проверяется и начальные слова добавляются в фоне после
+        # запуска, схема не проверяется (миграции применяются отдельно: python Migrations.py)
+        self.fast_start = os.getenv("FAST_START") == "1"
+        self._warm_up_task = None
+        self.db = DatabaseManager(check_connection=not self.fast_start)
+        self.metrics = Metrics()
+        self.metrics.instrument_engine(self.db.engine)
+        self.metrics.instrument_engine(self.db.async_engine.sync_engine)
+        self.metrics.add_gauges("word_cache", self.db.word_cache.stats)
+        self._metrics_server = None
+        # Ограничение частоты: до RATE_BURST обновлений подряд, дальше RATE_LIMIT в секунду (0 - без ограничения)
+        self.rate_limiter = TokenBucketLimiter(
+            rate=float(os.getenv("RATE_LIMIT", "3")),
+            burst=int(os.getenv("RATE_BURST", "10"))
+        )
+        self.coalescer = Coalescer()
+        # Пользователи, которым доступны служебные команды (/metrics)
+        self.admin_ids = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()}
+        if not self.fast_start:
+            self.db.initialize_schema()
+            self.db.initialize_words()
+        self.quiz_engine = QuizEngine(self.db, distractor_snapshot=os.getenv("DISTRACTOR_INDEX"))
+        self.quiz_decks = QuizDecks(self.quiz_engine)
+        self.quiz_states = create_quiz_state_store(self.db)
+        self.answers = AnswerQueue(self.db)
+        # Импорт и экспорт выполняются фоновыми заданиями, не больше JOB_WORKERS одновременно
+        self.jobs = JobQueue(
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            max_pending=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+            threads=int(os.getenv("JOB_THREADS", "2")),
+            shutdown_timeout=float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))
+        )
+        self.metrics.add_gauges("jobs", self.jobs.stats)
 
         token = os.getenv("TELEGRAM_BOT_TOKEN")
         if not token:
             raise ValueError("Токен бота не найден в переменных окружения!")
 
-        self.application = Application.builder().token(token).build()
+        self.callbacks = CallbackCodec(token)
+        # Клавиатуры и постоянные тексты создаются один раз; BOT_LOCALE - язык по умолчанию
+        self.ui = UserInterface(os.getenv("BOT_LOCALE", "ru"))
+        # Кнопка главного меню -> обработчик. Обработчики с запросами к БД учитываются в метриках
+        # под теми же именами, что и команды, а не внутри handle_message
+        self._menu_actions = {
+            "add": self._prompt_add,
+            "remove": self._prompt_remove,
+            "list": self.metrics.track("list_words", self.list_words),
+            "stats": self.metrics.track("show_stats", self.show_stats),
+            "quiz": self.metrics.track("quiz", self.quiz),
+            "hide": self._hide_keyboard,
+            "cancel": self._cancel,
+        }
+        # Обновления обрабатываются параллельно, но не больше CONCURRENT_UPDATES одновременно
+        builder = Application.builder().token(token) \
+            .concurrent_updates(int(os.getenv("CONCURRENT_UPDATES", "64"))) \
+            .post_init(self._on_startup).post_stop(self._on_stop).post_shutdown(self._on_shutdown)
+        if request is not None:
+            builder = builder.request(request)
+        self.application = builder.build()
         self._register_handlers()
 
+    async def _on_startup(self, application: Application):
+        """Запуск фоновых задач после инициализации приложения"""
+        await self.quiz_states.start()
+        await self.quiz_engine.start()
+        await self.answers.start()
+        await self.jobs.start()
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            self._metrics_server = await self.metrics.start_http_server(
+                os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port)
+            )
+        if self.fast_start:
+            self._warm_up_task = asyncio.create_task(self._warm_up())
+        logger.info(f"Бот готов к работе за {Settings.uptime():.2f} с")
+
+    async def _warm_up(self):
+        """Отложенная проверка подключения к БД и добавление начальных слов (FAST_START)"""
+        if not await self.db.check_connection_async():
+            return
+        try:
+            await self.db.initialize_words_async()
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении начальных слов: {e}")
+
+    async def _on_stop(self, application: Application):
+        """Завершение фоновых заданий, пока бот еще может отправить их результаты"""
+        await self.jobs.close()
+
+    async def _on_shutdown(self, application: Application):
+        """Сохранение буферов и закрытие асинхронного пула соединений при остановке приложения"""
+        if self._metrics_server:
+            self._metrics_server.close()
+        if self._warm_up_task:
+            await self._warm_up_task
+        await self.jobs.close()
+        await self.quiz_decks.close()
+        await self.quiz_engine.close()
+        await self.quiz_states.close()
+        await self.answers.close()
+        await self.db.async_engine.dispose()
+
     def _register_handlers(self):
         """Регистрация обработчиков команд"""
+        track = self._handler
         handlers = [
-            CommandHandler("start", self.start),
-            CommandHandler("add", self.add_word),
-            CommandHandler("remove", self.remove_word),
-            CommandHandler("quiz", self.quiz),
-            CommandHandler("list", self.list_words),
-            CommandHandler("stats", self.show_stats),
-            MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message),
-            CallbackQueryHandler(self.handle_button_click)
+            CommandHandler("start", track("start", self.start)),
+            CommandHandler("add", track("add_word", self.add_word)),
+            CommandHandler("remove", track("remove_word", self.remove_word)),
+            CommandHandler("quiz", track("quiz", self.quiz)),
+            CommandHandler("list", track("list_words", self.list_words)),
+            CommandHandler("stats", track("show_stats", self.show_stats)),
+            CommandHandler("import", track("import_words", self.import_words)),
+            CommandHandler("export", track("export_words", self.export_words)),
+            CommandHandler("metrics", self.show_metrics),
+            MessageHandler(filters.Document.ALL, track("import_words", self.import_words)),
+            MessageHandler(filters.TEXT & ~filters.COMMAND, track("handle_message", self.handle_message)),
+            CallbackQueryHandler(track("handle_button_click", self.handle_button_click))
         ]
         for handler in handlers:
             self.application.add_handler(handler)
 
+    def _handler(self, name, callback):
+        """Обработчик с метриками, склейкой повторов и ограничением частоты пользователя"""
+        callback = self.metrics.track(name, callback)
+
+        @wraps(callback)
+        async def guarded(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            user = update.effective_user
+            if user is None:
+                return await callback(update, context)
+
+            # Тот же текст или кнопка, пока предыдущее такое же обновление еще обрабатывается
+            query = update.callback_query
+            key = (user.id, name, query.data if query else update.effective_message.text)
+            if not self.coalescer.acquire(key):
+                await self._drop(name, update)
+                return
+            try:
+                if not self.rate_limiter.allow(user.id):
+                    await self._drop(name, update)
+                    return
+                return await callback(update, context)
+            finally:
+                self.coalescer.release(key)
+
+        return guarded
+
+    async def _drop(self, name, update):
+        """Отбрасывает обновление без обращения к БД"""
+        self.metrics.drop(name)
+        if update.callback_query:
+            # Без ответа на нажатие у пользователя останется индикатор загрузки на кнопке
+            await update.callback_query.answer()
+
     # ==================== ОСНОВНЫЕ КОМАНДЫ ====================
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /start"""
         try:
-            await update.message.reply_text(
-                "👋 Привет! Я бот для изучения английских слов.\n\n"
-                "Основные команды:\n"
-                "/add - добавить новое слово\n"
-                "/remove - удалить слово\n"
-                "/quiz - начать викторину\n"
-                "/list - показать все слова\n"
-                "/stats - показать прогресс\n\n"
-                "Используй кнопки ниже для быстрого доступа:",
-                reply_markup=self._get_main_menu()
-            )
+            locale = self.ui.locale(update.effective_user)
+            await update.message.reply_text(locale.texts["start"], reply_markup=locale.main_menu)
         except Exception as e:
             logger.error(f"Ошибка в команде start: {e}")
 
-    def _get_main_menu(self):
-        """Создает главное меню с кнопками"""
-        return ReplyKeyboardMarkup([
-            [KeyboardButton("➕ Добавить слово"), KeyboardButton("🗑️ Удалить слово")],
-            [KeyboardButton("📋 Список слов"), KeyboardButton("📊 Статистика")],
-            [KeyboardButton("🎯 Викторина"), KeyboardButton("❌ Скрыть клавиатуру")]
-        ], resize_keyboard=True)
+    def _get_main_menu(self, update):
+        """Главное меню на языке пользователя (создано один раз при запуске)"""
+        return self.ui.locale(update.effective_user).main_menu
 
     async def show_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показывает статистику изучения"""
         user_id = update.effective_user.id
-        with self.db.get_session() as session:
-            try:
-                # Получаем общее количество слов пользователя
-                total_words = session.query(BaseModel.UserWord).filter_by(user_id=user_id).count()
-
-                # Получаем количество изученных слов
-                learned_words = session.query(BaseModel.UserWord).filter_by(
-                    user_id=user_id,
-                    passed_word=True
-                ).count()
+        try:
+            stats = await self.db.get_stats(user_id)
 
-                # Получаем количество новых слов за последнюю неделю
-                # (здесь нужна доработка с датами)
+            await update.message.reply_text(
+                f"📊 Ваша статистика:\n\n"
+                f"• Всего слов: {stats.total}\n"
+                f"• Изучено: {stats.learned}\n"
+                f"• Добавлено за неделю: {stats.added_week}\n"
+                f"• Прогресс: {round(stats.learned / max(stats.total, 1) * 100)}%\n\n"
+                f"Продолжайте в том же духе! 💪",
+                reply_markup=self._get_main_menu(update)
+            )
 
-                await update.message.reply_text(
-                    f"📊 Ваша статистика:\n\n"
-                    f"• Всего слов: {total_words}\n"
-                    f"• Изучено: {learned_words}\n"
-                    f"• Прогресс: {round(learned_words / max(total_words, 1) * 100)}%\n\n"
-                    f"Продолжайте в том же духе! 💪",
-                    reply_markup=self._get_main_menu()
-                )
+        except Exception as e:
+            logger.error(f"Ошибка при получении статистики: {e}")
+            await update.message.reply_text(
+                "⚠️ Не удалось получить статистику. Попробуйте позже.",
+                reply_markup=self._get_main_menu(update)
+            )
 
-            except Exception as e:
-                logger.error(f"Ошибка при получении статистики: {e}")
-                await update.message.reply_text(
-                    "⚠️ Не удалось получить статистику. Попробуйте позже.",
-                    reply_markup=self._get_main_menu()
-                )
+    async def show_metrics(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Сводка метрик обработчиков (только для ADMIN_IDS)"""
+        if update.effective_user.id not in self.admin_ids:
+            await update.message.reply_text(self.ui.locale(update.effective_user).texts["unknown"])
+            return
+        await update.message.reply_text(f"📈 Метрики обработчиков:\n\n{self.metrics.summary()}")
 
     # ==================== РАБОТА СО СЛОВАМИ ====================
     async def add_word(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Добавление нового слова в словарь"""
         if not context.args:
+            locale = self.ui.locale(update.effective_user)
             await update.message.reply_text(
-                "📝 Введите слово и перевод через пробел:\n"
-                "Пример: <code>яблоко apple</code>",
-                parse_mode="HTML",
-                reply_markup=ReplyKeyboardMarkup(
-                    [[KeyboardButton("Отмена")]],
-                    resize_keyboard=True
-                )
+                locale.texts["add_prompt"], parse_mode="HTML", reply_markup=locale.cancel_menu
             )
             return
 
@@ -142,155 +252,254 @@ class VocabularyBot:
             ru_word, en_word = context.args[0].lower(), context.args[1].lower()
             user_id = update.effective_user.id
 
-            with self.db.get_session() as session:
-                # Проверяем существование слова
-                word = session.query(BaseModel.Word).filter_by(
-                    target_word=ru_word,
-                    translate_word=en_word
-                ).first()
-
-                if not word:
-                    word = BaseModel.Word(target_word=ru_word, translate_word=en_word)
-                    session.add(word)
-                    session.commit()
-
-                # Проверяем, есть ли уже связь с пользователем
-                user_word = session.query(BaseModel.UserWord).filter_by(
-                    user_id=user_id,
-                    word_id=word.id
-                ).first()
-
-                if not user_word:
-                    user_word = BaseModel.UserWord(
-                        user_id=user_id,
-                        word_id=word.id,
-                        passed_word=False
-                    )
-                    session.add(user_word)
-                    session.commit()
+            word, _ = await self.db.add_user_word(user_id, ru_word, en_word)
+            self.quiz_engine.on_word_added(word)
+            self.quiz_decks.invalidate(user_id)
 
-                await update.message.reply_text(
-                    f"✅ Слово <b>{ru_word}</b> - <b>{en_word}</b> успешно добавлено!",
-                    parse_mode="HTML",
-                    reply_markup=self._get_main_menu()
-                )
+            await update.message.reply_text(
+                f"✅ Слово <b>{ru_word}</b> - <b>{en_word}</b> успешно добавлено!",
+                parse_mode="HTML",
+                reply_markup=self._get_main_menu(update)
+            )
 
         except Exception as e:
             logger.error(f"Ошибка при добавлении слова: {e}")
             await update.message.reply_text(
                 "❌ Произошла ошибка. Проверьте формат ввода и попробуйте еще раз.",
-                reply_markup=self._get_main_menu()
+                reply_markup=self._get_main_menu(update)
             )
 
     async def remove_word(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Удаление слова из словаря пользователя"""
         if not context.args:
-            await update.message.reply_text(
-                "🗑 Введите слово, которое хотите удалить:",
-                reply_markup=ReplyKeyboardMarkup(
-                    [[KeyboardButton("Отмена")]],
-                    resize_keyboard=True
-                )
-            )
+            locale = self.ui.locale(update.effective_user)
+            await update.message.reply_text(locale.texts["remove_prompt"], reply_markup=locale.cancel_menu)
             return
 
         try:
             word_to_remove = context.args[0].lower()
             user_id = update.effective_user.id
 
-            with self.db.get_session() as session:
-                word = session.query(BaseModel.Word).filter_by(target_word=word_to_remove).first()
+            if not await self.db.remove_user_word(user_id, word_to_remove):
+                await update.message.reply_text("❌ Слово не найдено!")
+                return
+            self.quiz_decks.invalidate(user_id)
 
-                if not word:
-                    await update.message.reply_text("❌ Слово не найдено!")
-                    return
+            await update.message.reply_text(
+                f"🗑 Слово <b>{word_to_remove}</b> удалено из вашего словаря!",
+                parse_mode="HTML",
+                reply_markup=self._get_main_menu(update)
+            )
 
-                # Удаляем из user_words
-                session.query(BaseModel.UserWord).filter_by(
-                    user_id=user_id,
-                    word_id=word.id
-                ).delete()
+        except Exception as e:
+            logger.error(f"Ошибка при удалении слова: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при удалении слова",
+                reply_markup=self._get_main_menu(update)
+            )
 
-                # Добавляем в игнорируемые
-                if not session.query(BaseModel.IgnoreWord).filter_by(
-                        user_id=user_id,
-                        word_id=word.id
-                ).first():
-                    ignore_word = BaseModel.IgnoreWord(user_id=user_id, word_id=word.id)
-                    session.add(ignore_word)
+    async def import_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Массовый импорт слов из присланного CSV/TSV файла"""
+        document = update.message.document
+        if not document:
+            await update.message.reply_text(
+                "📎 Пришлите файл .csv, .tsv или .txt: в каждой строке слово и перевод, "
+                "разделенные табуляцией, точкой с запятой или запятой.\n"
+                "Пример строки: <code>яблоко;apple</code>",
+                parse_mode="HTML",
+                reply_markup=self._get_main_menu(update)
+            )
+            return
 
-                session.commit()
+        file_name = (document.file_name or "").lower()
+        if not file_name.endswith((".csv", ".tsv", ".txt")):
+            await update.message.reply_text("❌ Поддерживаются только файлы .csv, .tsv и .txt")
+            return
+        if document.file_size and document.file_size > 20 * 1024 * 1024:
+            await update.message.reply_text("❌ Файл слишком большой (максимум 20 МБ)")
+            return
 
-                await update.message.reply_text(
-                    f"🗑 Слово <b>{word_to_remove}</b> удалено из вашего словаря!",
-                    parse_mode="HTML",
-                    reply_markup=self._get_main_menu()
-                )
+        user_id = update.effective_user.id
+
+        async def job():
+            await self._import_job(update, user_id, document)
+
+        await self._submit_job(
+            update, "import", job, "⏳ Файл принят, импорт выполняется. Я сообщу, когда он завершится."
+        )
+
+    async def _import_job(self, update: Update, user_id, document):
+        # Модуль импорта/экспорта нужен только фоновым заданиям и не замедляет запуск
+        from VocabularyIO import import_file
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, "import.csv")
+                tg_file = await document.get_file()
+                await tg_file.download_to_drive(path)
+                total, linked = await import_file(self.db, user_id, path, executor=self.jobs.executor)
+
+            self.quiz_decks.invalidate(user_id)
+            await update.message.reply_text(
+                f"✅ Импорт завершен!\n\n"
+                f"• Прочитано пар: {total}\n"
+                f"• Добавлено в ваш словарь: {linked}",
+                reply_markup=self._get_main_menu(update)
+            )
 
         except Exception as e:
-            logger.error(f"Ошибка при удалении слова: {e}")
+            logger.error(f"Ошибка при импорте слов: {e}")
             await update.message.reply_text(
-                "❌ Произошла ошибка при удалении слова",
-                reply_markup=self._get_main_menu()
+                "❌ Не удалось импортировать файл. Проверьте его формат и кодировку (UTF-8).",
+                reply_markup=self._get_main_menu(update)
             )
 
-    async def list_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Показать список слов пользователя с пагинацией"""
+    async def export_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Выгрузка словаря пользователя файлом CSV или JSON"""
+        from VocabularyIO import EXPORT_FORMATS
+
+        export_format = context.args[0].lower() if context.args else "csv"
+        if export_format not in EXPORT_FORMATS:
+            await update.message.reply_text("❌ Поддерживаются форматы: csv, json. Пример: /export json")
+            return
+
         user_id = update.effective_user.id
-        page = int(context.args[0]) if context.args and context.args[0].isdigit() else 1
-        page_size = 10
 
-        with self.db.get_session() as session:
-            try:
-                # Получаем общее количество слов
-                total_words = session.query(BaseModel.UserWord).filter_by(user_id=user_id).count()
-                if not total_words:
+        async def job():
+            await self._export_job(update, user_id, export_format)
+
+        await self._submit_job(
+            update, "export", job, "⏳ Готовлю файл со словарем, пришлю его, когда он будет готов."
+        )
+
+    async def _export_job(self, update: Update, user_id, export_format):
+        from VocabularyIO import export_file
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, f"vocabulary.{export_format}")
+                count = await export_file(self.db, user_id, path, export_format, executor=self.jobs.executor)
+                if not count:
                     await update.message.reply_text(
-                        "📭 Ваш словарь пуст! Добавьте слова через /add",
-                        reply_markup=self._get_main_menu()
+                        self.ui.locale(update.effective_user).texts["empty"],
+                        reply_markup=self._get_main_menu(update)
                     )
                     return
+                if os.path.getsize(path) > 50 * 1024 * 1024:
+                    await update.message.reply_text("❌ Словарь слишком большой для отправки файлом (максимум 50 МБ)")
+                    return
 
-                # Вычисляем общее количество страниц
-                total_pages = (total_words + page_size - 1) // page_size
-                page = max(1, min(page, total_pages))
-
-                # Получаем слова для текущей страницы
-                words = session.query(BaseModel.Word).join(BaseModel.UserWord).filter(
-                    BaseModel.UserWord.user_id == user_id
-                ).order_by(BaseModel.Word.target_word).offset((page - 1) * page_size).limit(page_size).all()
-
-                # Формируем сообщение
-                word_list = "\n".join(
-                    f"• {word.target_word} - {word.translate_word}" +
-                    (" ✅" if session.query(BaseModel.UserWord).filter_by(
-                        user_id=user_id,
-                        word_id=word.id,
-                        passed_word=True
-                    ).first() else "")
-                    for word in words
-                )
+                with open(path, "rb") as document:
+                    await update.message.reply_document(
+                        document,
+                        filename=f"vocabulary.{export_format}",
+                        caption=f"📤 Ваш словарь: {count} слов",
+                        reply_markup=self._get_main_menu(update)
+                    )
 
-                # Создаем клавиатуру пагинации
-                pagination = []
-                if page > 1:
-                    pagination.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"page_{page - 1}"))
-                if page < total_pages:
-                    pagination.append(InlineKeyboardButton("Вперед ➡️", callback_data=f"page_{page + 1}"))
+        except Exception as e:
+            logger.error(f"Ошибка при экспорте слов: {e}")
+            await update.message.reply_text(
+                "❌ Не удалось выгрузить словарь. Попробуйте позже.",
+                reply_markup=self._get_main_menu(update)
+            )
 
-                reply_markup = InlineKeyboardMarkup([pagination]) if pagination else None
+    async def _submit_job(self, update: Update, name, job, accepted_text):
+        """Ставит тяжелую команду в очередь фоновых заданий и сразу отвечает пользователю"""
+        key = (update.effective_user.id, name)
+        if self.jobs.is_active(key):
+            await update.message.reply_text("⏳ Предыдущая такая команда еще выполняется, дождитесь ее результата.")
+            return
+        async def on_cancel():
+            await update.message.reply_text(
+                f"⚠️ Бот перезапускается, команда /{name} не выполнена. Повторите ее через пару минут.",
+                reply_markup=self._get_main_menu(update)
+            )
 
-                await update.message.reply_text(
-                    f"📖 Ваши слова (стр. {page}/{total_pages}):\n\n{word_list}",
-                    reply_markup=reply_markup
-                )
+        if not self.jobs.submit(key, name, self.metrics.track(f"job_{name}", job), on_cancel):
+            await update.message.reply_text("⚠️ Сейчас слишком много задач. Попробуйте через несколько минут.")
+            return
+        await update.message.reply_text(accepted_text)
+
+    async def list_words(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Показать список слов пользователя с пагинацией"""
+        user_id = update.effective_user.id
+        page = int(context.args[0]) if context.args and context.args[0].isdigit() else 1
 
-            except Exception as e:
-                logger.error(f"Ошибка при получении списка слов: {e}")
+        try:
+            words_page = await self._build_words_page(user_id, page)
+            if not words_page:
                 await update.message.reply_text(
-                    "❌ Произошла ошибка при получении списка слов",
-                    reply_markup=self._get_main_menu()
+                    self.ui.locale(update.effective_user).texts["empty"],
+                    reply_markup=self._get_main_menu(update)
                 )
+                return
+
+            text, reply_markup = words_page
+            await update.message.reply_text(text, reply_markup=reply_markup)
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении списка слов: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при получении списка слов",
+                reply_markup=self._get_main_menu(update)
+            )
+
+    async def _build_words_page(self, user_id, page, total_words=None, after_id=None, before_id=None):
+        """Формирует текст и клавиатуру страницы словаря.
+
+        Без курсора страница выбирается по номеру (команда /list N), с курсором -
+        по ключу от первого/последнего слова соседней страницы (кнопки page_*).
+        Возвращает None, если словарь пуст.
+        """
+        page_size = 10
+        # /list 0 и номера из старых кнопок не дают отрицательного OFFSET
+        page = max(1, page)
+
+        if after_id is None and before_id is None:
+            words = await self.db.get_words_page(user_id, page_size, offset=(page - 1) * page_size)
+            if not words and page > 1:
+                # Номер страницы больше числа страниц - показываем последнюю
+                first_page = await self.db.get_words_page(user_id, page_size)
+                if first_page:
+                    page = (first_page[0].matched + page_size - 1) // page_size
+                    words = await self.db.get_words_page(user_id, page_size, offset=(page - 1) * page_size)
+            if words:
+                # OFFSET применяется после оконной функции: matched - весь словарь
+                total_words = words[0].matched
+        else:
+            words = await self.db.get_words_page(user_id, page_size, after_id=after_id, before_id=before_id)
+            if not words:
+                # Соседняя страница опустела (слова удалены) - показываем первую
+                return await self._build_words_page(user_id, 1)
+            if after_id is not None:
+                total_words = (page - 1) * page_size + words[0].matched
+
+        if not words:
+            return None
+
+        # Вычисляем общее количество страниц
+        total_pages = max(page, (total_words + page_size - 1) // page_size)
+
+        # Формируем сообщение
+        word_list = "\n".join(
+            f"• {word.target_word} - {word.translate_word}" + (" ✅" if word.passed_word else "")
+            for word in words
+        )
+
+        # Создаем клавиатуру пагинации: page_<страница>_<всего слов>_<p|n><id слова-курсора>
+        pagination = []
+        if page > 1:
+            pagination.append(InlineKeyboardButton(
+                "⬅️ Назад", callback_data=f"page_{page - 1}_{total_words}_p{words[0].id}"
+            ))
+        if page < total_pages:
+            pagination.append(InlineKeyboardButton(
+                "Вперед ➡️", callback_data=f"page_{page + 1}_{total_words}_n{words[-1].id}"
+            ))
+
+        reply_markup = InlineKeyboardMarkup([pagination]) if pagination else None
+        return f"📖 Ваши слова (стр. {page}/{total_pages}):\n\n{word_list}", reply_markup
 
     # ==================== ВИКТОРИНА ====================
     async def quiz(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -303,67 +512,40 @@ class VocabularyBot:
                 return
 
             user_id = update.effective_user.id
-            with self.db.get_session() as session:
-                # Получаем слова пользователя
-                user_words = session.query(BaseModel.Word).join(BaseModel.UserWord).filter(
-                    BaseModel.UserWord.user_id == user_id,
-                    BaseModel.UserWord.passed_word == False
-                ).all()
-
-                # Получаем случайные слова из основной таблицы
-                added_words_ids = [w.id for w in user_words]
-                all_words = session.query(BaseModel.Word).filter(
-                    ~BaseModel.Word.id.in_(added_words_ids) if added_words_ids else True
-                ).order_by(text("RANDOM()")).limit(5).all()
-
-                words = user_words + all_words
-                if not words:
-                    await message.reply_text(
-                        "Ваш словарь пуст! Добавьте слова через /add",
-                        reply_markup=self._get_main_menu()
-                    )
-                    return
-
-                word = random.choice(words)
-                correct_answer = word.translate_word
-
-                # Получаем варианты ответов
-                wrong_answers = session.execute(
-                    text("""
-                    SELECT translate_word 
-                    FROM words 
-                    WHERE translate_word != :correct 
-                    GROUP BY translate_word
-                    ORDER BY RANDOM() 
-                    LIMIT 3
-                    """).bindparams(correct=correct_answer)
-                ).fetchall()
-
-                options = [t[0] for t in wrong_answers] + [correct_answer]
-                random.shuffle(options)
-
-                # Сохраняем данные для проверки
-                context.user_data['quiz'] = {
-                    'correct_answer': correct_answer,
-                    'word_id': word.id,
-                    'is_user_word': word in user_words
-                }
-
-                keyboard = [
-                    [InlineKeyboardButton(opt, callback_data=f"quiz_{opt}")]
-                    for opt in options
-                ]
-
+            question = await self.quiz_decks.pop(user_id)
+            if not question:
                 await message.reply_text(
-                    f"Как переводится слово '{word.target_word}'?",
-                    reply_markup=InlineKeyboardMarkup(keyboard))
+                    self.ui.locale(update.effective_user).texts["empty"],
+                    reply_markup=self._get_main_menu(update)
+                )
+                return
+
+            # Сохраняем данные для проверки под id вопроса: несколько вопросов
+            # могут оставаться активными одновременно
+            question_id = new_question_id()
+            await self.quiz_states.put(f"q{question_id}", {
+                'user_id': user_id,
+                'correct_answer': question.correct_answer,
+                'correct_option': question.options.index(question.correct_answer),
+                'word_id': question.word_id,
+                'review': question.review.to_list() if question.review else None
+            })
+
+            keyboard = [
+                [InlineKeyboardButton(opt, callback_data=self.callbacks.encode_answer(question_id, i))]
+                for i, opt in enumerate(question.options)
+            ]
+
+            await message.reply_text(
+                f"Как переводится слово '{question.target_word}'?",
+                reply_markup=InlineKeyboardMarkup(keyboard))
 
         except Exception as e:
             logger.error(f"Ошибка при запуске викторины: {e}")
             if update.message:  # Дополнительная проверка
                 await update.message.reply_text(
                     "❌ Ошибка при запуске викторины",
-                    reply_markup=self._get_main_menu()
+                    reply_markup=self._get_main_menu(update)
                 )
 
     async def handle_button_click(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -381,79 +563,143 @@ class VocabularyBot:
                 logger.error("Не удалось получить объект сообщения")
                 return
 
-            if query.data.startswith("quiz_"):
-                # Обработка ответа
-                user_answer = query.data[5:]
-                quiz_data = context.user_data.get('quiz', {})
-                correct_answer = quiz_data.get('correct_answer')
-
-                if user_answer == correct_answer:
-                    response = f"✅ Правильно! {correct_answer} - верный ответ!"
-                else:
-                    response = f"❌ Неверно! Правильный ответ: {correct_answer}"
+            answer = self.callbacks.decode_answer(query.data)
+            if answer:
+                await self._handle_quiz_answer(query, *answer)
 
-                await query.edit_message_text(response)
-
-                # Предлагаем продолжить
-                keyboard = [[InlineKeyboardButton("➡️ Продолжить", callback_data="continue_quiz")]]
-                await message.reply_text(
-                    "Продолжить викторину?",
-                    reply_markup=InlineKeyboardMarkup(keyboard))
+            elif query.data.startswith("quiz_"):
+                # Кнопки старого формата с текстом ответа
+                await query.edit_message_text("⌛ Вопрос устарел. Начните викторину заново: /quiz")
 
             elif query.data == "continue_quiz":
-                await self.quiz(update, context)
+                # Учитывается в метриках quiz, как кнопка меню
+                await self._menu_actions["quiz"](update, context)
+
+            elif query.data.startswith("page_"):
+                await self._handle_page_click(query)
 
         except Exception as e:
             logger.error(f"Ошибка в обработчике кнопок: {e}")
             if update.callback_query and update.callback_query.message:
                 await update.callback_query.message.reply_text(
                     "⚠️ Произошла ошибка, попробуйте снова",
-                    reply_markup=self._get_main_menu()
+                    reply_markup=self._get_main_menu(update)
                 )
+
+    async def _handle_quiz_answer(self, query, question_id, option):
+        """Проверка ответа на вопрос викторины"""
+        quiz_key = f"q{question_id}"
+        # Состояние забирается атомарно: повторное нажатие не засчитает ответ дважды
+        quiz_data = await self.quiz_states.pop(quiz_key)
+        if quiz_data and quiz_data['user_id'] != query.from_user.id:
+            # Чужой вопрос: возвращаем состояние владельцу
+            await self.quiz_states.put(quiz_key, quiz_data)
+            quiz_data = None
+        if not quiz_data:
+            await query.edit_message_text("⌛ Вопрос устарел. Начните викторину заново: /quiz")
+            return
+        correct_answer = quiz_data['correct_answer']
+
+        is_correct = option == quiz_data['correct_option']
+        if quiz_data['review']:
+            # Слово из словаря пользователя: планируем следующее повторение (SM-2)
+            review = SpacedRepetition.Review.from_list(quiz_data['review'])
+            graded, due_at = SpacedRepetition.grade(
+                review, SpacedRepetition.QUALITY_CORRECT if is_correct else SpacedRepetition.QUALITY_WRONG
+            )
+            await self.answers.record(query.from_user.id, quiz_data['word_id'], graded, due_at, review.passed_word)
+
+        if is_correct:
+            response = f"✅ Правильно! {correct_answer} - верный ответ!"
+        else:
+            response = f"❌ Неверно! Правильный ответ: {correct_answer}"
+
+        await query.edit_message_text(response)
+
+        # Предлагаем продолжить
+        locale = self.ui.locale(query.from_user)
+        await query.message.reply_text(locale.texts["continue_quiz"], reply_markup=locale.continue_quiz)
+
+    async def _handle_page_click(self, query):
+        """Переход по страницам списка слов (кнопки page_*)"""
+        parts = query.data.split("_")
+        if len(parts) == 4:
+            page, total_words, cursor = int(parts[1]), int(parts[2]), parts[3]
+            cursor_id = int(cursor[1:])
+            words_page = await self._build_words_page(
+                query.from_user.id, page, total_words,
+                after_id=cursor_id if cursor[0] == "n" else None,
+                before_id=cursor_id if cursor[0] == "p" else None
+            )
+        else:
+            # Кнопки старого формата page_<N>
+            words_page = await self._build_words_page(query.from_user.id, int(parts[1]))
+
+        if not words_page:
+            await query.edit_message_text(self.ui.locale(query.from_user).texts["empty"])
+            return
+
+        text, reply_markup = words_page
+        await query.edit_message_text(text, reply_markup=reply_markup)
+
     # ==================== ОБРАБОТКА ТЕКСТОВЫХ СООБЩЕНИЙ ====================
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка текстовых сообщений"""
         text = update.message.text
 
-        if text == "➕ Добавить слово":
-            await update.message.reply_text(
-                "Введите слово и перевод через пробел (например: <code>яблоко apple</code>)",
-                parse_mode="HTML"
-            )
-        elif text == "🗑️ Удалить слово":
-            await update.message.reply_text("Введите слово, которое хотите удалить:")
-        elif text == "📋 Список слов":
-            await self.list_words(update, context)
-        elif text == "📊 Статистика":
-            await self.show_stats(update, context)
-        elif text == "🎯 Викторина":
-            await self.quiz(update, context)
-        elif text == "❌ Скрыть клавиатуру":
-            await update.message.reply_text(
-                "Клавиатура скрыта. Напишите /start для её возврата.",
-                reply_markup=ReplyKeyboardRemove()
-            )
-        elif text == "Отмена":
+        action = self._menu_actions.get(self.ui.route(text))
+        if action:
+            await action(update, context)
+        elif len(text.split()) >= 2:
+            # Попытка автоматически определить, хочет ли пользователь добавить слово
+            context.args = text.split()
+            await self.add_word(update, context)
+        else:
             await update.message.reply_text(
-                "✖️ Действие отменено",
-                reply_markup=self._get_main_menu()
+                self.ui.locale(update.effective_user).texts["unknown"],
+                reply_markup=self._get_main_menu(update)
             )
-        else:
-            # Попытка автоматически определить, хочет ли пользователь добавить слово
-            if len(text.split()) >= 2:
-                context.args = text.split()
-                await self.add_word(update, context)
-            else:
-                await update.message.reply_text(
-                    "Я не понимаю эту команду. Используйте меню или команды.",
-                    reply_markup=self._get_main_menu()
-                )
+
+    async def _prompt_add(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(self.ui.locale(update.effective_user).texts["add_hint"], parse_mode="HTML")
+
+    async def _prompt_remove(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(self.ui.locale(update.effective_user).texts["remove_hint"])
+
+    async def _hide_keyboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        locale = self.ui.locale(update.effective_user)
+        await update.message.reply_text(locale.texts["keyboard_hidden"], reply_markup=locale.hide_keyboard)
+
+    async def _cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        locale = self.ui.locale(update.effective_user)
+        await update.message.reply_text(locale.texts["cancelled"], reply_markup=locale.main_menu)
+
+    def webhook_options(self):
+        """Параметры run_webhook / Updater.start_webhook из переменных окружения WEBHOOK_*"""
+        url_path = os.getenv("WEBHOOK_PATH", "telegram")
+        webhook_url = os.getenv("WEBHOOK_URL")
+        if not webhook_url:
+            raise ValueError("Для режима webhook нужен публичный адрес WEBHOOK_URL!")
+
+        return {
+            "listen": os.getenv("WEBHOOK_LISTEN", "0.0.0.0"),
+            "port": int(os.getenv("WEBHOOK_PORT", "8443")),
+            "url_path": url_path,
+            "webhook_url": f"{webhook_url.rstrip('/')}/{url_path}",
+            "secret_token": os.getenv("WEBHOOK_SECRET"),
+            # Telegram допускает от 1 до 100 одновременных соединений с webhook
+            "max_connections": min(self.application.update_processor.max_concurrent_updates, 100),
+        }
 
     def run(self):
-        """Запуск бота"""
+        """Запуск бота в режиме BOT_MODE: polling (по умолчанию) или webhook"""
         try:
-            logger.info("Запуск бота...")
-            self.application.run_polling()
+            mode = os.getenv("BOT_MODE", "polling")
+            logger.info(f"Запуск бота в режиме {mode}...")
+            if mode == "webhook":
+                self.application.run_webhook(**self.webhook_options())
+            else:
+                self.application.run_polling()
         except Exception as e:
             logger.critical(f"Фатальная ошибка: {e}")
         finally:
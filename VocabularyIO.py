@@ -0,0 +1,166 @@
+"""Массовый импорт и экспорт словаря.
+
+Импорт: файл читается потоково, каждая строка - пара "слово;перевод"
+(разделитель - табуляция, точка с запятой или запятая, определяется по первой
+строке). Пары записываются в БД пачками через DatabaseManager.import_words.
+
+Экспорт: слова пользователя читаются серверным курсором
+(DatabaseManager.iter_user_words) и сразу пишутся в файл, память не зависит от
+размера словаря. CSV пишется без заголовка, с разделителем ";" и колонками
+EXPORT_COLUMNS - его можно загрузить обратно импортом. JSON - массив объектов
+с теми же полями.
+
+Запуск из командной строки:
+    python VocabularyIO.py import words.csv --user-id 123456
+    python VocabularyIO.py export words.json --user-id 123456
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+MAX_WORD_LENGTH = 255
+
+# Колонки экспорта: первые две совпадают с форматом импорта
+EXPORT_COLUMNS = (
+    "target_word", "translate_word", "passed_word", "added_at",
+    "ease", "interval_days", "repetitions", "due_at",
+)
+EXPORT_FORMATS = ("csv", "json")
+
+
+def _detect_delimiter(line):
+    for delimiter in ("\t", ";", ","):
+        if delimiter in line:
+            return delimiter
+    return ","
+
+
+def iter_word_pairs(stream):
+    """Потоково разбирает текстовый поток на пары (слово, перевод).
+
+    Пустые, неполные и слишком длинные строки пропускаются.
+    """
+    first_line = stream.readline()
+    if not first_line:
+        return
+    delimiter = _detect_delimiter(first_line)
+
+    def lines():
+        yield first_line
+        yield from stream
+
+    for row in csv.reader(lines(), delimiter=delimiter):
+        if len(row) < 2:
+            continue
+        ru_word, en_word = row[0].strip().lower(), row[1].strip().lower()
+        if not ru_word or not en_word:
+            continue
+        if len(ru_word) > MAX_WORD_LENGTH or len(en_word) > MAX_WORD_LENGTH:
+            continue
+        yield ru_word, en_word
+
+
+def batched(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def import_file(db, user_id, path, batch_size=1000, executor=None):
+    """Импортирует файл в словарь пользователя. Возвращает (пар прочитано, слов добавлено).
+
+    Файл разбирается пачками в пуле потоков executor (None - пул цикла событий
+    по умолчанию), цикл событий только записывает пачки в БД.
+    """
+    loop = asyncio.get_running_loop()
+    total, linked = 0, 0
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        batches = batched(iter_word_pairs(stream), batch_size)
+        while batch := await loop.run_in_executor(executor, next, batches, None):
+            batch_total, batch_linked = await db.import_words(user_id, batch, batch_size)
+            total += batch_total
+            linked += batch_linked
+    return total, linked
+
+
+def _export_values(row):
+    return [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+
+
+def _csv_chunk_writer(stream):
+    writer = csv.writer(stream, delimiter=";")
+    return lambda chunk, written: writer.writerows(chunk)
+
+
+def _json_chunk_writer(stream):
+    def write(chunk, written):
+        for i, values in enumerate(chunk):
+            stream.write(",\n" if written + i else "\n")
+            json.dump(dict(zip(EXPORT_COLUMNS, values)), stream, ensure_ascii=False)
+    return write
+
+
+async def export_file(db, user_id, path, export_format="csv", batch_size=1000, executor=None):
+    """Потоково выгружает словарь пользователя в файл. Возвращает число слов.
+
+    Строки пишутся пачками по batch_size в пуле потоков executor (None - пул
+    цикла событий по умолчанию).
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {export_format}")
+
+    loop = asyncio.get_running_loop()
+    count, chunk = 0, []
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        write = _csv_chunk_writer(stream) if export_format == "csv" else _json_chunk_writer(stream)
+        if export_format == "json":
+            stream.write("[")
+        async for row in db.iter_user_words(user_id, batch_size):
+            chunk.append(_export_values(row))
+            if len(chunk) >= batch_size:
+                await loop.run_in_executor(executor, write, chunk, count)
+                count, chunk = count + len(chunk), []
+        if chunk:
+            await loop.run_in_executor(executor, write, chunk, count)
+            count += len(chunk)
+        if export_format == "json":
+            stream.write("\n]\n")
+    return count
+
+
+async def _main(args):
+    from DatabaseManeger import DatabaseManager
+
+    db = DatabaseManager()
+    try:
+        if args.command == "import":
+            total, linked = await import_file(db, args.user_id, args.path, args.batch_size)
+            logger.info(f"Прочитано пар: {total}, добавлено в словарь пользователя: {linked}")
+        else:
+            export_format = args.format or ("json" if args.path.lower().endswith(".json") else "csv")
+            count = await export_file(db, args.user_id, args.path, export_format, args.batch_size)
+            logger.info(f"Выгружено слов: {count} в {args.path}")
+    finally:
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт словаря пользователя")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="импорт пар слов из CSV/TSV")
+    import_parser.add_argument("path", help="путь к файлу")
+    import_parser.add_argument("--user-id", type=int, required=True, help="Telegram id пользователя")
+    import_parser.add_argument("--batch-size", type=int, default=1000, help="размер пачки вставки")
+    export_parser = commands.add_parser("export", help="экспорт словаря пользователя в CSV или JSON")
+    export_parser.add_argument("path", help="путь к файлу")
+    export_parser.add_argument("--user-id", type=int, required=True, help="Telegram id пользователя")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS,
+                               help="формат файла (по умолчанию - по расширению, иначе csv)")
+    export_parser.add_argument("--batch-size", type=int, default=1000, help="строк на выборку курсора")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+
+# ==================== ЗАПИСЬ СЛОВАРЯ ====================
+class WordEntry:
+    __slots__ = ("id", "target_word", "translate_word")
+
+    def __init__(self, word_id, target_word, translate_word):
+        self.id = word_id
+        self.target_word = target_word
+        self.translate_word = translate_word
+
+
+# ==================== КЭШ СЛОВАРЯ ====================
+class WordCache:
+    """LRU-кэш строк общего словаря words.
+
+    Слова почти не меняются, поэтому строки читаются из БД один раз и дальше
+    находятся по id, по паре (слово, перевод) или по слову. Вместо ORM-объектов
+    хранятся компактные WordEntry. Вставка новой пары сбрасывает поиск по ее
+    слову: "первое слово с таким написанием" могло измениться.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._by_pair = {}
+        self._by_target = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, word_id):
+        entry = self._entries.get(word_id) if word_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(word_id)
+        return entry
+
+    def get(self, word_id):
+        return self._lookup(word_id)
+
+    def get_by_pair(self, target_word, translate_word):
+        return self._lookup(self._by_pair.get((target_word, translate_word)))
+
+    def get_by_target(self, target_word):
+        return self._lookup(self._by_target.get(target_word))
+
+    def put(self, word_id, target_word, translate_word, by_target=False):
+        """Добавляет строку; by_target - запомнить ее как результат поиска по слову"""
+        entry = self._entries.get(word_id)
+        if entry is None:
+            entry = self._entries[word_id] = WordEntry(word_id, target_word, translate_word)
+            self._by_pair[(target_word, translate_word)] = word_id
+        self._entries.move_to_end(word_id)
+        if by_target:
+            self._by_target[target_word] = word_id
+
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._by_pair.pop((evicted.target_word, evicted.translate_word), None)
+            if self._by_target.get(evicted.target_word) == evicted.id:
+                del self._by_target[evicted.target_word]
+        return entry
+
+    def invalidate_target(self, target_word):
+        """Сбрасывает поиск по слову после вставки новой пары с ним"""
+        self._by_target.pop(target_word, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
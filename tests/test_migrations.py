@@ -0,0 +1,68 @@
+"""Объединение повторяющихся слов при миграции схемы (необратимо меняет данные)."""
+import pytest
+from sqlalchemy import create_engine, text
+
+import Migrations
+
+LEGACY_SCHEMA = """
+CREATE TABLE words (
+    id INTEGER PRIMARY KEY, target_word VARCHAR(255) NOT NULL, translate_word VARCHAR(255) NOT NULL
+);
+CREATE TABLE user_words (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, word_id INTEGER NOT NULL REFERENCES words (id),
+    passed_word BOOLEAN NOT NULL
+);
+CREATE TABLE ignore_words (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, word_id INTEGER NOT NULL REFERENCES words (id)
+);
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(text(statement))
+        conn.execute(text("INSERT INTO words (id, target_word, translate_word) VALUES (1, 'кот', 'cat'), (2, 'кот', 'cat')"))
+    yield engine
+    engine.dispose()
+
+
+def _user_words(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT user_id, word_id, passed_word FROM user_words ORDER BY user_id")).all()
+
+
+@pytest.mark.parametrize("rows", [
+    # Изучена копия с наименьшим id слова, но ссылка на нее не первая
+    [(5, 7, 2, 0), (10, 7, 1, 1)],
+    # Изучена копия-дубликат
+    [(5, 7, 1, 0), (10, 7, 2, 1)],
+])
+def test_merge_keeps_passed_flag(engine, rows):
+    with engine.begin() as conn:
+        for row in rows:
+            conn.execute(
+                text("INSERT INTO user_words (id, user_id, word_id, passed_word) VALUES (:id, :user, :word, :passed)"),
+                dict(zip(("id", "user", "word", "passed"), row))
+            )
+
+    Migrations.upgrade(engine)
+
+    assert _user_words(engine) == [(7, 1, 1)]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM words")).scalars().all() == [1]
+
+
+def test_merge_keeps_unpassed_word_unpassed(engine):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user_words (id, user_id, word_id, passed_word) VALUES (5, 7, 2, 0), (10, 7, 1, 0)"))
+        conn.execute(text("INSERT INTO ignore_words (id, user_id, word_id) VALUES (1, 8, 2), (2, 8, 1)"))
+
+    Migrations.upgrade(engine)
+
+    assert _user_words(engine) == [(7, 1, 0)]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT user_id, word_id FROM ignore_words")).all() == [(8, 1)]
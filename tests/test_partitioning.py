@@ -0,0 +1,88 @@
+"""Пересекционирование user_words и ignore_words в SQLite (эмулированные секции)."""
+import pytest
+from sqlalchemy import text
+
+import Partitioning
+from DatabaseManeger import DatabaseManager
+
+USERS = range(16)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'partitions.db'}")
+    monkeypatch.setenv("USER_PARTITIONS", "4")
+    db = DatabaseManager()
+    db.initialize_schema()
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO words (id, target_word, translate_word) VALUES (:id, :ru, :en)"),
+                     [{"id": 100 + user_id, "ru": f"слово{user_id}", "en": f"word{user_id}"} for user_id in USERS])
+        for user_id in USERS:
+            # В каждой секции своя последовательность id: id повторяются между секциями
+            conn.execute(db.partitions.user_words(user_id).insert().values(
+                user_id=user_id, word_id=100 + user_id, passed_word=user_id % 2 == 0
+            ))
+            conn.execute(db.partitions.ignore_words(user_id).insert().values(user_id=user_id, word_id=100 + user_id))
+    yield db
+    db.engine.dispose()
+
+
+def _rows(conn, table_name):
+    """Строки всех таблиц с данными table_name: {(user_id, word_id): таблица}"""
+    rows = {}
+    for name in Partitioning.row_counts(conn, table_name):
+        for user_id, word_id in conn.execute(text(f"SELECT user_id, word_id FROM {name}")):
+            rows[(user_id, word_id)] = name
+    return rows
+
+
+def _passed(conn):
+    return {
+        user_id: bool(passed)
+        for name in Partitioning.row_counts(conn, "user_words")
+        for user_id, passed in conn.execute(text(f"SELECT user_id, passed_word FROM {name}"))
+    }
+
+
+@pytest.mark.parametrize("count", [0, 3])
+def test_repartition_keeps_rows(db, count):
+    with db.engine.connect() as conn:
+        passed_before = _passed(conn)
+
+    with db.engine.begin() as conn:
+        Partitioning.repartition(conn, count)
+
+    with db.engine.connect() as conn:
+        assert Partitioning.current_count(conn, "user_words") == count
+        assert _passed(conn) == passed_before
+        for table_name in ("user_words", "ignore_words"):
+            rows = _rows(conn, table_name)
+            assert set(rows) == {(user_id, 100 + user_id) for user_id in USERS}
+            expected = {
+                (user_id, 100 + user_id): Partitioning.partition_name(table_name, user_id % count) if count
+                else table_name
+                for user_id in USERS
+            }
+            assert rows == expected
+
+
+def test_repartition_failure_rolls_back(db, monkeypatch):
+    def fail(conn, table, count):
+        raise RuntimeError("сбой")
+
+    # user_words уже перенесена, ошибка на ignore_words
+    original = Partitioning._repartition_sqlite
+    monkeypatch.setattr(
+        Partitioning, "_repartition_sqlite",
+        lambda conn, table, count: (fail if table.name == "ignore_words" else original)(conn, table, count)
+    )
+    with pytest.raises(RuntimeError):
+        with db.engine.begin() as conn:
+            Partitioning.repartition(conn, 0)
+
+    with db.engine.connect() as conn:
+        assert Partitioning.current_count(conn, "user_words") == 4
+        assert len(_rows(conn, "user_words")) == len(USERS)
+        assert "user_words_repartition" not in conn.exec_driver_sql(
+            "SELECT group_concat(name) FROM sqlite_master WHERE type = 'table'"
+        ).scalar()